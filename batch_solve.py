@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import glob
+import itertools
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Literal, Tuple
+import numpy as np
+# Only the pure logic modules, workers never pay for importing manim
+from nonogram.binary import BINARY_SUFFIX, BinaryTrace, write_binary
+from nonogram.bitline import UNKNOWN
+from nonogram.formats import PUZZLE_SUFFIXES, read_puzzle
+from nonogram.parse import iter_steps, write_solution_file
+from search import Search
+from solver import Contradiction, dp_solve, overlap_solve, solve
+
+BatchStatus = Literal["solved"] | Literal["stalled"] | Literal["contradictory"] | Literal["error"]
+# (puzzle, status, seconds, cells left unknown, message)
+BatchResult = Tuple[str, BatchStatus, float, int, str]
+
+TRACE_SUFFIX = ".solution.txt"
+BINARY_TRACE_SUFFIX = ".solution" + BINARY_SUFFIX
+
+
+def trace_path(puzzle: str, binary: bool = False) -> str:
+    # Trace goes next to the puzzle, puzzles/cat.txt -> puzzles/cat.solution.txt (or cat.solution.ngb)
+    return os.path.splitext(puzzle)[0] + (BINARY_TRACE_SUFFIX if binary else TRACE_SUFFIX)
+
+
+def has_steps(path: str) -> bool:
+    # Traces hold steps after the hints, puzzle files stop at the hints
+    try:
+        match os.path.splitext(path)[1].lower():
+            case ".txt":
+                with contextlib.closing(iter_steps(path)) as steps:
+                    return next(steps, None) is not None
+            case ".ngb":
+                return len(BinaryTrace(path)) > 0
+    except (OSError, ValueError):
+        # Broken files are left in so solve_file reports what's wrong with them
+        return False
+    return False
+
+
+def find_puzzles(patterns: List[str]) -> List[str]:
+    """
+    Expands directories (every puzzle file inside) and glob patterns, leaving out traces,
+    both the ones written by earlier runs and any other file that already has steps in it like a solution.txt.
+    """
+    puzzles = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for suffix in PUZZLE_SUFFIXES:
+                puzzles.extend(glob.glob(os.path.join(pattern, "*" + suffix)))
+        else:
+            puzzles.extend(glob.glob(pattern))
+    return sorted({path for path in puzzles if os.path.isfile(path) and not path.endswith((TRACE_SUFFIX, BINARY_TRACE_SUFFIX)) and not has_steps(path)})
+
+
+def solve_file(puzzle: str, full: bool = False, search: bool = False, binary: bool = False) -> BatchResult:
+    write = write_binary if binary else write_solution_file
+    start = time.perf_counter()
+    try:
+        row_hints, col_hints = read_puzzle(puzzle)
+        grid, steps = solve(row_hints, col_hints, dp_solve if full else overlap_solve)
+        if search and (grid == UNKNOWN).any():
+            # Only puzzles line solving stalls on are searched, carrying on from where it stopped
+            searcher = Search(row_hints, col_hints, grid=grid)
+            write(trace_path(puzzle, binary), row_hints, col_hints, itertools.chain(steps, searcher.run()))
+            elapsed = time.perf_counter() - start
+            if not searcher.solutions:
+                return puzzle, "contradictory", elapsed, int(np.count_nonzero(searcher.grid == UNKNOWN)), ""
+            return puzzle, "solved", elapsed, 0, searcher.status
+        write(trace_path(puzzle, binary), row_hints, col_hints, steps)
+    except Contradiction as e:
+        return puzzle, "contradictory", time.perf_counter() - start, -1, str(e)
+    except (OSError, ValueError) as e:
+        return puzzle, "error", time.perf_counter() - start, -1, str(e)
+    elapsed = time.perf_counter() - start
+    unknown = int(np.count_nonzero(grid == UNKNOWN))
+    return puzzle, "solved" if not unknown else "stalled", elapsed, unknown, f"{len(steps)} steps"
+
+
+def format_result(result: BatchResult) -> str:
+    puzzle, status, elapsed, unknown, message = result
+    line = f"{status:<14} {elapsed:8.3f}s  {puzzle}"
+    if status == "stalled":
+        line += f"  ({unknown} cells unknown)"
+    if message:
+        line += f"  {message}"
+    return line
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve every puzzle in a directory or glob across all cores, writing a trace next to each one")
+    parser.add_argument("puzzles", nargs="+", help="Puzzle files (.txt, .non, webpbn .xml or .ngb), directories or glob patterns")
+    parser.add_argument("--full", action="store_true", help="Use the complete line solver instead of just overlap")
+    parser.add_argument("--search", action="store_true", help="Probe and backtrack when line solving stalls")
+    parser.add_argument("--binary", action="store_true", help=f"Write traces in the compact {BINARY_SUFFIX} format")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to one per core")
+    args = parser.parse_args()
+
+    puzzles = find_puzzles(args.puzzles)
+    if not puzzles:
+        parser.error("no puzzle files found")
+
+    counts = Counter()
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(solve_file, puzzle, args.full, args.search, args.binary) for puzzle in puzzles]
+        # Printed as they finish so one slow puzzle doesn't hold up the rest of the report
+        for future in as_completed(futures):
+            result = future.result()
+            counts[result[1]] += 1
+            print(format_result(result), flush=True)
+    elapsed = time.perf_counter() - start
+    print(f"{len(puzzles)} puzzles in {elapsed:.3f}s: " + ", ".join(f"{count} {status}" for status, count in counts.most_common()))
@@ -0,0 +1,159 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+import numpy as np
+from nonogram.bitline import UNKNOWN
+from nonogram.formats import read_trace
+from nonogram.parse import Hints
+from nonogram.state import Step
+from solver import solve
+
+# Editing any of these changes how chunks look, so their source is part of every chunk's cache key
+RENDER_SOURCES = ["main.py", "puzzle.py", "text_cache.py", "manim.cfg"]
+
+
+class Chunk:
+    """
+    A run of steps along with the grid they start from, which is everything needed to render it on its own.
+    The first chunk also draws the game in and the last one holds on the finished grid, like VisualizeSolution.
+    """
+    def __init__(self, index: int, start: np.ndarray, steps: List[Step], first: bool, last: bool) -> None:
+        self.index = index
+        self.start = start
+        self.steps = steps
+        self.first = first
+        self.last = last
+
+    def key(self, row_hints: Hints, col_hints: Hints, quality: str, batched: bool, sources: str) -> str:
+        data = json.dumps([sources, quality, batched, row_hints, col_hints, self.start.tolist(), self.steps, self.first, self.last])
+        return hashlib.sha256(data.encode()).hexdigest()
+
+
+def split_trace(rows: int, cols: int, steps: List[Step], chunk_size: int) -> List[Chunk]:
+    # Replays the trace once, taking a copy of the grid at every chunk boundary
+    grid = np.full((rows, cols), UNKNOWN, dtype=np.uint8)
+    chunks = []
+    starts = range(0, max(len(steps), 1), chunk_size)
+    for index, start in enumerate(starts):
+        chunk_steps = steps[start:start + chunk_size]
+        chunks.append(Chunk(index, grid.copy(), chunk_steps, index == 0, index == len(starts) - 1))
+        for line, i, direction in chunk_steps:
+            if direction == "row":
+                grid[i] = line
+            else:
+                grid[:, i] = line
+    return chunks
+
+
+def sources_hash() -> str:
+    digest = hashlib.sha256()
+    for file_name in RENDER_SOURCES:
+        if os.path.exists(file_name):
+            with open(file_name, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def render_chunk(row_hints: Hints, col_hints: Hints, chunk: Chunk, quality: str, batched: bool, output: str) -> Tuple[int, float]:
+    # Runs in a worker process, manim is only imported here
+    start = time.perf_counter()
+    from manim import Create, Scene, tempconfig
+    from main import place_game, play_solution
+    from nonogram.state import SquareState
+    from puzzle import Game
+    from text_cache import text_cache
+
+    class SolutionChunk(Scene):
+        def construct(self):
+            game = place_game(Game(row_hints, col_hints, 1, batched=batched))
+            # The grid picks up exactly where the previous chunk left off
+            known = np.argwhere(chunk.start != UNKNOWN)
+            game.grid.set_cell_states((int(row), int(col), SquareState(int(chunk.start[row, col]))) for row, col in known)
+            if chunk.first:
+                self.play(Create(game))
+            else:
+                self.add(game)
+            play_solution(self, game, (([SquareState(square) for square in line], i, direction) for line, i, direction in chunk.steps))
+            if chunk.last:
+                self.wait(3)
+
+    with tempfile.TemporaryDirectory() as media_dir:
+        with tempconfig({"media_dir": media_dir, "quality": quality, "output_file": f"chunk_{chunk.index}"}):
+            scene = SolutionChunk()
+            scene.render()
+            # Moved in under its final name only once it's complete, so a crash never leaves a broken chunk in the cache
+            shutil.move(str(scene.renderer.file_writer.movie_file_path), output + ".part")
+            os.replace(output + ".part", output)
+    # Workers never run atexit hooks, so the text cache is saved here
+    text_cache.save()
+    return chunk.index, time.perf_counter() - start
+
+
+def concat_videos(videos: List[str], output: str):
+    # The concat demuxer just copies the streams, every chunk was encoded with the same settings
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        for video in videos:
+            f.write(f"file '{os.path.abspath(video)}'\n")
+        list_file = f.name
+    try:
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file, "-c", "copy", output], check=True)
+    finally:
+        os.remove(list_file)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render VisualizeSolution in chunks across processes, only re-rendering chunks that changed")
+    parser.add_argument("trace", nargs="?", default="solution.txt", help="Solution trace (.txt or .ngb), or a .non/.xml puzzle which is solved first")
+    parser.add_argument("output", nargs="?", default=os.path.join("media", "videos", "VisualizeSolution_chunked.mp4"))
+    parser.add_argument("--chunk-size", type=int, default=50, help="Steps per chunk")
+    parser.add_argument("--quality", default="high_quality", choices=["low_quality", "medium_quality", "high_quality", "production_quality", "fourk_quality"])
+    parser.add_argument("--batched", action="store_true", help="Draw the grid as a BatchedGrid, much faster for big puzzles")
+    parser.add_argument("--cache-dir", default=os.path.join("media", "chunks"))
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to one per core")
+    args = parser.parse_args()
+
+    try:
+        row_hints, col_hints, steps = read_trace(args.trace)
+        if os.path.splitext(args.trace)[1].lower() in (".non", ".xml"):
+            # Imported puzzles only come with hints, so the solver fills in the steps like VisualizeSolution does
+            _, steps = solve(row_hints, col_hints)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    steps = [([getattr(square, "value", square) for square in line], i, direction) for line, i, direction in steps]
+    chunks = split_trace(len(row_hints), len(col_hints), steps, args.chunk_size)
+    sources = sources_hash()
+    os.makedirs(args.cache_dir, exist_ok=True)
+    videos = [os.path.join(args.cache_dir, chunk.key(row_hints, col_hints, args.quality, args.batched, sources) + ".mp4") for chunk in chunks]
+    todo = [(chunk, video) for chunk, video in zip(chunks, videos) if not os.path.exists(video)]
+    print(f"{len(chunks)} chunks, {len(chunks) - len(todo)} cached, {len(todo)} to render")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(render_chunk, row_hints, col_hints, chunk, args.quality, args.batched, video): chunk.index for chunk, video in todo}
+        failures = []
+        for future in as_completed(futures):
+            try:
+                index, elapsed = future.result()
+            except Exception:
+                failures.append((futures[future], traceback.format_exc(limit=-3)))
+                print(f"chunk {futures[future]} FAILED", flush=True)
+                continue
+            print(f"chunk {index} rendered in {elapsed:.1f}s", flush=True)
+
+    # Chunks that did render stay cached, so running again only redoes the failed ones
+    for index, error in failures:
+        print(f"\nchunk {index} failed:\n{error}")
+    if failures:
+        raise SystemExit(f"{len(failures)}/{len(todo)} chunks failed, {args.output} not written")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    concat_videos(videos, args.output)
+    print(f"{args.output} written in {time.perf_counter() - start:.1f}s")
@@ -1,8 +1,11 @@
 from typing import Literal, override
 from manim import BLUE, DOWN, RED, UP, AnimationGroup, Arrow, DiGraph, Dot, Graph, Indicate, Scene, Text, VGroup
 
-from placement_tree import PlacementTree, PlacementTreeNode, edge_list_from_nodes, generate_nodes_from_leaves
-from puzzle import LabeledPointer, Line, SegPlacer, SquareState, states_to_cells
+from nonogram import SquareState, edge_list_from_nodes, generate_nodes_from_leaves, placements
+from placement_tree import PlacementTree, PlacementTreeNode, placement_layout
+from puzzle import LabeledPointer, Line, SegPlacer, states_to_cells
+from text_cache import cached_text
+from timeline import Timeline
 
 UNKNOWN = SquareState.UNKOWN
 EMPTY = SquareState.EMPTY
@@ -17,7 +20,7 @@ class SegPos(Scene):
         line.set_seg_color(0, BLUE)
         numbers = VGroup()
         for i in range(10):
-            number = Text(str(i))
+            number = cached_text(str(i))
             number.scale_to_fit_height(0.5)
             number.next_to(line.squares_group[i], UP)
             numbers.add(number.copy())
@@ -79,30 +82,24 @@ class AvoidX(Scene):
         arrow.next_to(seg_placer.squares_group[0], DOWN)
         self.add(seg_placer, arrow)
 
-        self.play(seg_placer.animate.move_segment_to(0, 0))
-        self.play(arrow.animate.next_to(seg_placer.squares_group[2], DOWN), seg_placer.squares_group[1].animated_set_state(EMPTY))
+        timeline = Timeline()
+        timeline.add(timeline.move_segment_to(seg_placer, 0, 0))
+        timeline.add(timeline.move(arrow, lambda arrow: arrow.next_to(seg_placer.squares_group[2], DOWN)), timeline.set_state(seg_placer.squares_group[1], EMPTY))
 
-        self.play(seg_placer.animate.move_segment_to(1, 2))
-        self.play(Indicate(seg_placer.squares_group[3].x_mark, color=RED, scale_factor=1.3))
-        self.play(seg_placer.animate.move_segment_to(1, 3), seg_placer.squares_group[2].animated_set_state(EMPTY))
-        self.play(Indicate(seg_placer.squares_group[3].x_mark, color=RED, scale_factor=1.3))
-        self.play(seg_placer.animate.move_segment_to(1, 4))
-        self.play(arrow.animate.next_to(seg_placer.squares_group[7], DOWN), seg_placer.squares_group[6].animated_set_state(EMPTY))
+        timeline.add(timeline.move_segment_to(seg_placer, 1, 2))
+        timeline.add(Indicate(seg_placer.squares_group[3].x_mark, color=RED, scale_factor=1.3))
+        timeline.add(timeline.move_segment_to(seg_placer, 1, 3), timeline.set_state(seg_placer.squares_group[2], EMPTY))
+        timeline.add(Indicate(seg_placer.squares_group[3].x_mark, color=RED, scale_factor=1.3))
+        timeline.add(timeline.move_segment_to(seg_placer, 1, 4))
+        timeline.add(timeline.move(arrow, lambda arrow: arrow.next_to(seg_placer.squares_group[7], DOWN)), timeline.set_state(seg_placer.squares_group[6], EMPTY))
 
-        self.play(seg_placer.animate.move_segment_to(2, 7))
+        timeline.add(timeline.move_segment_to(seg_placer, 2, 7))
+        timeline.play(self)
 
 class ExampleTree(Scene):
     def construct(self):
-        permutations = [
-            (0, 2),
-            (0, 3),
-            (0, 4),
-            (1, 3),
-            (1, 4),
-            (2, 4),
-        ]
         hint = [1, 2]
-        tree = PlacementTree(permutations, hint, length=6, layout_config={"vertex_spacing": (-7, 4)})
+        tree = PlacementTree(placements(6, hint), hint, length=6, spacing=(7, 4))
         tree.scale_to_fit_width(14)
         self.add(tree)
 
@@ -117,6 +114,6 @@ class TestTree(Scene):
         # vertex_config = {vertex: {"key": vertex, "hint": hint, "initial_line": initial_line} for vertex in vertices}
         vertex_config = {vertex: {"key": vertex, "hint": hint, "length": 6} for vertex in vertices}
         # layout = {(None, None): [0, 0, 0], (0, None): [0, -1, 0], (0, 2): [0, -2, 0]}
-        tree = DiGraph(vertices, edges, layout="tree", vertex_type=PlacementTreeNode, root_vertex=vertices[0], vertex_config=vertex_config, layout_config={"vertex_spacing": (2, 2)})
+        tree = DiGraph(vertices, edges, layout=placement_layout(vertices, (2, 2)), vertex_type=PlacementTreeNode, vertex_config=vertex_config)
         self.add(tree)
 
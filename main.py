@@ -1,6 +1,9 @@
-from typing import List, Literal, Tuple
+import os
+from typing import Iterable, Iterator, List, Tuple
 from manim import ORIGIN, Create, LaggedStart, Scene, Uncreate
-from puzzle import Cell, Game, Grid, Hint, HintSet, SquareState
+from nonogram import BinaryTrace, SolutionStep, SquareState, read_puzzle, read_solution
+from puzzle import Cell, Game, Grid, Hint, HintSet
+from solver import solve
 
 class TestCell(Scene):
     def construct(self):
@@ -100,63 +103,46 @@ class TestGame(Scene):
         self.wait(3)
 
 
-def parse_solution_file(file_name) -> Tuple[Game, List[Tuple[List[SquareState], int, Literal["row"] | Literal["col"]]]]:
-    """
-3 # Row Hints
-1 1
-1
-
-2 # Col Hints
-1 1
-2
-
-0 row o o o # Solution
-0 col o o x
-2 col o o x
-1 row o x o
-2 row x o x
-    """
-    def parse_square(square: str) -> SquareState:
-        match square.strip():
-            case "o":
-                return SquareState.FILLED
-            case "x":
-                return SquareState.EMPTY
-            case "_":
-                return SquareState.UNKOWN
-            case _:
-                raise ValueError(f"{square} is not 'o', 'x', or '_'")
-
-    with open(file_name, "r") as f:
-        row_hint = []
-        while (line := f.readline()) != "\n":
-            row_hint.append(list(map(lambda x: int(x), line.split(" "))))
-        col_hint = []
-        while (line := f.readline()) != "\n":
-            col_hint.append(list(map(lambda x: int(x), line.split(" "))))
-        solution = []
-        while (line := f.readline()):
-            line_list = line.split(" ")
-            i = int(line_list[0])
-            if line_list[1] not in {"row", "col"}:
-                raise ValueError("Direction must be 'row' or 'col'")
-            direction = line_list[1]
-            line = list(map(parse_square, line_list[2:]))
-            solution.append((line, i, direction))
-
-    return (Game(row_hint, col_hint, 1), solution)
+def parse_solution_file(file_name, batched: bool = False) -> Tuple[Game, Iterator[SolutionStep]]:
+    # Steps are read lazily as the scene plays them, batched draws the grid as a BatchedGrid instead of one Cell per square
+    match os.path.splitext(file_name)[1].lower():
+        case ".ngb":
+            trace = BinaryTrace(file_name)
+            row_hint, col_hint = trace.hints()
+            solution = trace.iter_steps()
+        case ".non" | ".xml":
+            # Imported puzzles only come with hints, so the solver fills in the steps
+            row_hint, col_hint = read_puzzle(file_name)
+            solution = iter(solver_solution(row_hint, col_hint))
+        case _:
+            row_hint, col_hint, solution = read_solution(file_name)
+    return (Game(row_hint, col_hint, 1, batched=batched), solution)
+
+def solver_solution(row_hints: List[List[int]], col_hints: List[List[int]]) -> List[SolutionStep]:
+    # Same steps parse_solution_file gives, but straight from the solver instead of a file
+    _, steps = solve(row_hints, col_hints)
+    return [([SquareState(square) for square in line], i, direction) for line, i, direction in steps]
+
+def place_game(game: Game) -> Game:
+    # game.shift(DOWN * 1.3)
+    game.move_to(ORIGIN)
+    game.scale_to_fit_height(7.5)
+    return game
+
+def play_solution(scene: Scene, game: Game, solution: Iterable[SolutionStep]):
+    for solution_line in solution:
+        try:
+            scene.play(LaggedStart(*game.grid.set_line(*solution_line), lag_ratio=0.15))
+        except ValueError:
+            pass
 
 class VisualizeSolution(Scene):
+    # Plays solution.txt, or any trace or puzzle file NONOGRAM_PUZZLE points at.
+    # Setting NONOGRAM_BATCHED draws the grid as a BatchedGrid, which big puzzles need to render in reasonable time
     def construct(self):
-        game, solution = parse_solution_file("solution.txt")
-        # game.shift(DOWN * 1.3)
-        game.move_to(ORIGIN)
-        game.scale_to_fit_height(7.5)
+        game, solution = parse_solution_file(os.environ.get("NONOGRAM_PUZZLE", "solution.txt"), bool(os.environ.get("NONOGRAM_BATCHED")))
+        place_game(game)
         self.play(Create(game))
-        for solution_line in solution:
-            try:
-                self.play(LaggedStart(*game.grid.set_line(*solution_line), lag_ratio=0.15))
-            except ValueError:
-                pass
+        play_solution(self, game, solution)
         self.wait(3)
 
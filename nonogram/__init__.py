@@ -0,0 +1,11 @@
+"""
+Puzzle logic with no manim in it: cell states, reading and writing hint and solution files (text or binary),
+enumerating segment placements and building placement trees.
+Anything that only needs to parse or solve puzzles should import from here so it starts fast.
+"""
+from nonogram.binary import BinaryTrace, binary_to_text, text_to_binary, write_binary
+from nonogram.formats import PUZZLE_SUFFIXES, iter_webpbn, read_non, read_puzzle, read_trace, read_webpbn
+from nonogram.parse import ParseError, format_step, iter_steps, normalize_hint, parse_square, read_hints, read_solution, write_solution_file
+from nonogram.placements import count_placements, placement_counts, placements
+from nonogram.state import Direction, SolutionStep, SquareState, Step
+from nonogram.tree import edge_list_from_nodes, generate_nodes_from_leaves, tree_from_leaves, tree_layout
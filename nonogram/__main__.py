@@ -0,0 +1,48 @@
+import argparse
+import os
+from nonogram.binary import BINARY_SUFFIX, write_binary
+from nonogram.formats import read_trace
+from nonogram.parse import write_solution_file
+
+
+def check(file_name) -> str:
+    row_hints, col_hints, steps = read_trace(file_name)
+    n_steps = sum(1 for _ in steps)
+    return f"{file_name}: {len(row_hints)}x{len(col_hints)}, {n_steps} steps"
+
+
+def convert(file_name, output: str | None) -> str:
+    # Binary files become text and anything else becomes binary, unless output says otherwise
+    if output is None:
+        root, suffix = os.path.splitext(file_name)
+        output = root + (".txt" if suffix == BINARY_SUFFIX else BINARY_SUFFIX)
+    write = write_binary if output.endswith(BINARY_SUFFIX) else write_solution_file
+    write(output, *read_trace(file_name))
+    return f"{file_name} -> {output}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check or convert puzzle and solution files without loading them into memory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check_parser = commands.add_parser("check", help="Validate text, binary, .non or webpbn .xml files")
+    check_parser.add_argument("files", nargs="+")
+    convert_parser = commands.add_parser("convert", help=f"Convert between the text format and the binary {BINARY_SUFFIX} format, or import a .non or webpbn .xml puzzle")
+    convert_parser.add_argument("file")
+    convert_parser.add_argument("output", nargs="?")
+    args = parser.parse_args()
+
+    match args.command:
+        case "check":
+            failed = False
+            for file_name in args.files:
+                try:
+                    print(check(file_name))
+                except (OSError, ValueError) as e:
+                    print(e)
+                    failed = True
+            raise SystemExit(failed)
+        case "convert":
+            try:
+                print(convert(args.file, args.output))
+            except (OSError, ValueError) as e:
+                raise SystemExit(str(e))
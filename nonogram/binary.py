@@ -0,0 +1,213 @@
+"""
+Binary puzzle/trace files, laid out so a reader can memory map them and decode everything with NumPy.
+
+    header       HEADER, 24 bytes
+    hint offsets uint32 for every row hint then every column hint, plus one past the end
+    hint values  uint16, all the hints back to back
+    grid         final state of each row, 2 bits per cell
+    steps        one step_dtype record per step
+
+Sections after the hints start on 8 byte boundaries. All numbers are little endian.
+Cells are packed 4 to a byte, the first cell in the lowest 2 bits, using the SquareState values.
+"""
+from typing import Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+from nonogram.parse import Hints, read_solution, write_solution_file
+from nonogram.state import Direction, SolutionStep, SquareState, Step
+
+MAGIC = b"NONO"
+VERSION = 1
+BINARY_SUFFIX = ".ngb"
+
+HEADER = np.dtype([
+    ("magic", "S4"),
+    ("version", "<u2"),
+    ("rows", "<u2"),
+    ("cols", "<u2"),
+    ("reserved", "<u2"),
+    ("hint_values", "<u4"),
+    ("steps", "<u8"),
+])
+
+DIRECTIONS: Tuple[Direction, Direction] = ("row", "col")
+STATES = [SquareState.UNKOWN, SquareState.FILLED, SquareState.EMPTY]
+# Bit offset of each of the 4 cells in a byte
+SHIFTS = np.arange(0, 8, 2, dtype=np.uint8)
+
+# Steps are packed and written this many at a time
+CHUNK_SIZE = 4096
+
+
+def packed_size(length: int) -> int:
+    return (length + 3) // 4
+
+
+def step_dtype(rows: int, cols: int) -> np.dtype:
+    # Every record is wide enough for the longer of a row or a column
+    return np.dtype([("index", "<u2"), ("direction", "u1"), ("cells", "u1", (packed_size(max(rows, cols)),))])
+
+
+def align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+def pack_cells(cells: np.ndarray) -> np.ndarray:
+    # (n, length) states -> (n, packed_size(length)) bytes
+    n, length = cells.shape
+    padded = np.zeros((n, packed_size(length) * 4), dtype=np.uint8)
+    padded[:, :length] = cells
+    return np.bitwise_or.reduce(padded.reshape(n, -1, 4) << SHIFTS, axis=2).astype(np.uint8)
+
+
+def unpack_cells(packed: np.ndarray, length: int) -> np.ndarray:
+    # (n, bytes) -> (n, length) states
+    return ((packed[:, :, None] >> SHIFTS) & 3).reshape(len(packed), -1)[:, :length]
+
+
+def write_binary(file_name, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], steps: Iterable[Step | SolutionStep]):
+    """
+    Writes hints and steps in the binary format. Steps are packed a chunk at a time as they come in,
+    so a streamed trace is never held in memory all at once. Cells can be ints or SquareStates.
+    """
+    rows, cols = len(row_hints), len(col_hints)
+    hints = [*row_hints, *col_hints]
+    offsets = np.zeros(len(hints) + 1, dtype="<u4")
+    offsets[1:] = np.cumsum([len(hint) for hint in hints])
+    values = np.array([seg for hint in hints for seg in hint], dtype="<u2")
+    record = step_dtype(rows, cols)
+    grid = np.zeros((rows, cols), dtype=np.uint8)
+
+    header = np.zeros(1, dtype=HEADER)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["rows"] = rows
+    header["cols"] = cols
+    header["hint_values"] = len(values)
+
+    def flush(f, chunk: List[Tuple[List[int], int, int]]):
+        records = np.zeros(len(chunk), dtype=record)
+        cells = np.zeros((len(chunk), max(rows, cols)), dtype=np.uint8)
+        for n, (line, i, direction) in enumerate(chunk):
+            cells[n, :len(line)] = line
+            records["index"][n] = i
+            records["direction"][n] = direction
+        records["cells"] = pack_cells(cells)
+        f.write(records.tobytes())
+
+    with open(file_name, "wb") as f:
+        f.write(header.tobytes())
+        f.write(offsets.tobytes())
+        f.write(values.tobytes())
+        grid_start = align(f.tell())
+        f.seek(grid_start)
+        # Filled in at the end, once every step has been applied
+        f.write(bytes(rows * packed_size(cols)))
+        f.seek(align(f.tell()))
+
+        n_steps = 0
+        chunk = []
+        for line, i, direction in steps:
+            line = [getattr(square, "value", square) for square in line]
+            if direction == "row":
+                grid[i] = line
+            else:
+                grid[:, i] = line
+            chunk.append((line, i, DIRECTIONS.index(direction)))
+            if len(chunk) == CHUNK_SIZE:
+                flush(f, chunk)
+                n_steps += len(chunk)
+                chunk = []
+        if chunk:
+            flush(f, chunk)
+            n_steps += len(chunk)
+        # With no steps nothing has been written past the grid yet, this makes sure the file reaches the steps section
+        f.truncate(f.tell())
+
+        header["steps"] = n_steps
+        f.seek(0)
+        f.write(header.tobytes())
+        f.seek(grid_start)
+        f.write(pack_cells(grid).tobytes())
+
+
+class BinaryTrace:
+    """
+    Memory mapped view of a binary file. Nothing is read until it's asked for,
+    and steps are decoded a whole block at a time with NumPy.
+    """
+    def __init__(self, file_name) -> None:
+        self.file_name = file_name
+        self.data = np.memmap(file_name, dtype=np.uint8, mode="r")
+        if len(self.data) < HEADER.itemsize:
+            raise ValueError(f"{file_name} is too short to be a binary puzzle file")
+        header = self.data[:HEADER.itemsize].view(HEADER)[0]
+        if header["magic"] != MAGIC:
+            raise ValueError(f"{file_name} is not a binary puzzle file")
+        if header["version"] != VERSION:
+            raise ValueError(f"{file_name} is version {header['version']}, only version {VERSION} can be read")
+        self.rows = int(header["rows"])
+        self.cols = int(header["cols"])
+        self.n_steps = int(header["steps"])
+        self.record = step_dtype(self.rows, self.cols)
+
+        start = HEADER.itemsize
+        n_hints = self.rows + self.cols
+        self.hint_offsets = self.data[start:start + (n_hints + 1) * 4].view("<u4")
+        start += (n_hints + 1) * 4
+        self.hint_values = self.data[start:start + int(header["hint_values"]) * 2].view("<u2")
+        self.grid_start = align(start + int(header["hint_values"]) * 2)
+        self.steps_start = align(self.grid_start + self.rows * packed_size(self.cols))
+        end = self.steps_start + self.n_steps * self.record.itemsize
+        if len(self.data) < end:
+            raise ValueError(f"{file_name} is truncated, expected {end} bytes but it has {len(self.data)}")
+        # Structured view straight onto the mapped file
+        self.steps = self.data[self.steps_start:end].view(self.record)
+
+    def __len__(self) -> int:
+        return self.n_steps
+
+    def hints(self) -> Tuple[Hints, Hints]:
+        offsets = self.hint_offsets.tolist()
+        values = self.hint_values.tolist()
+        hints = [values[start:end] for start, end in zip(offsets, offsets[1:])]
+        return hints[:self.rows], hints[self.rows:]
+
+    @property
+    def grid(self) -> np.ndarray:
+        # State of every cell once all the steps have been applied
+        packed = self.data[self.grid_start:self.grid_start + self.rows * packed_size(self.cols)]
+        return unpack_cells(packed.reshape(self.rows, -1), self.cols)
+
+    def cells(self, start: int = 0, stop: int | None = None) -> np.ndarray:
+        """
+        Decoded cells of steps start to stop as a (steps, max(rows, cols)) array.
+        Row steps only use the first cols entries and column steps the first rows entries.
+        """
+        return unpack_cells(self.steps["cells"][start:stop], max(self.rows, self.cols))
+
+    def iter_raw_steps(self, chunk_size: int = CHUNK_SIZE) -> Iterator[Step]:
+        # Steps with plain int cells, like the solvers produce
+        lengths = (self.cols, self.rows)
+        for start in range(0, self.n_steps, chunk_size):
+            stop = min(start + chunk_size, self.n_steps)
+            cells = self.cells(start, stop)
+            indices = self.steps["index"][start:stop].tolist()
+            directions = self.steps["direction"][start:stop].tolist()
+            for line, i, direction in zip(cells, indices, directions):
+                yield line[:lengths[direction]].tolist(), i, DIRECTIONS[direction]
+
+    def iter_steps(self, chunk_size: int = CHUNK_SIZE) -> Iterator[SolutionStep]:
+        # Same steps read_solution gives, for anything that wants SquareStates
+        for line, i, direction in self.iter_raw_steps(chunk_size):
+            yield [STATES[square] for square in line], i, direction
+
+
+def text_to_binary(text_file, binary_file):
+    row_hints, col_hints, steps = read_solution(text_file)
+    write_binary(binary_file, row_hints, col_hints, steps)
+
+
+def binary_to_text(binary_file, text_file):
+    trace = BinaryTrace(binary_file)
+    row_hints, col_hints = trace.hints()
+    write_solution_file(text_file, row_hints, col_hints, trace.iter_raw_steps())
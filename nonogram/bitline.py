@@ -0,0 +1,133 @@
+from typing import List, Sequence, Tuple
+import numpy as np
+
+# Same values as SquareState, kept as plain ints so line logic can work on NumPy arrays and masks directly
+UNKNOWN = 0
+FILLED = 1
+EMPTY = 2
+
+# A line is stored as two ints, bit i of the first is set when cell i is filled
+# and bit i of the second is set when cell i is empty. Unknown cells are in neither.
+Masks = Tuple[int, int]
+
+
+def span(start: int, length: int) -> int:
+    # Mask with length bits set starting at start
+    return ((1 << length) - 1) << start
+
+
+def to_masks(line: Sequence) -> Masks:
+    # Works for lists of ints or SquareStates
+    filled = empty = 0
+    for i, square in enumerate(line):
+        square = getattr(square, "value", square)
+        if square == FILLED:
+            filled |= 1 << i
+        elif square == EMPTY:
+            empty |= 1 << i
+    return filled, empty
+
+
+def from_masks(filled: int, empty: int, length: int) -> List[int]:
+    return [FILLED if filled >> i & 1 else EMPTY if empty >> i & 1 else UNKNOWN for i in range(length)]
+
+
+def array_to_masks(line: np.ndarray) -> Masks:
+    # Same as to_masks but packs a whole NumPy line at once
+    def pack(bits: np.ndarray) -> int:
+        return int.from_bytes(np.packbits(bits, bitorder="little").tobytes(), "little")
+    return pack(line == FILLED), pack(line == EMPTY)
+
+
+def masks_to_array(filled: int, empty: int, length: int) -> np.ndarray:
+    def unpack(mask: int) -> np.ndarray:
+        data = np.frombuffer(mask.to_bytes((length + 7) // 8, "little"), dtype=np.uint8)
+        return np.unpackbits(data, count=length, bitorder="little").astype(bool)
+    line = np.full(length, UNKNOWN, dtype=np.uint8)
+    line[unpack(filled)] = FILLED
+    line[unpack(empty)] = EMPTY
+    return line
+
+
+def bits(mask: int) -> List[int]:
+    # Indices of every set bit, lowest first
+    indices = []
+    while mask:
+        low = mask & -mask
+        indices.append(low.bit_length() - 1)
+        mask ^= low
+    return indices
+
+
+def left_starts(hint: Sequence[int], filled: int, empty: int, length: int) -> List[int] | None:
+    """
+    Start index of each segment when every segment is pushed as far left as it can go
+    without contradicting the known cells. None if there is no valid placement.
+    """
+    starts = []
+    # (segment, position) pairs already known to have no valid placement
+    failed = set()
+    n_segs = len(hint)
+
+    def place(seg_i: int, pos: int) -> bool:
+        if seg_i == n_segs:
+            # Nothing left to cover a filled cell past the last segment
+            return not filled >> pos
+        if (seg_i, pos) in failed:
+            return False
+        seg = hint[seg_i]
+        seg_mask = (1 << seg) - 1
+        # A segment can't start past a filled cell, nothing else would cover it
+        rest = filled >> pos
+        last_start = (rest & -rest).bit_length() - 1 + pos if rest else length
+        if last_start > length - seg:
+            last_start = length - seg
+        start = pos
+        while start <= last_start:
+            blocking = empty >> start & seg_mask
+            if blocking:
+                # Jump straight past the last empty cell in the way
+                start += blocking.bit_length()
+                continue
+            end = start + seg
+            if not filled >> end & 1:
+                starts.append(start)
+                if place(seg_i + 1, end + 1 if end < length else length):
+                    return True
+                starts.pop()
+            start += 1
+        failed.add((seg_i, pos))
+        return False
+
+    return starts if place(0, 0) else None
+
+
+def mirror(mask: int, length: int) -> int:
+    return int(format(mask, f"0{length}b")[::-1], 2) if length else 0
+
+
+def right_starts(hint: Sequence[int], filled: int, empty: int, length: int) -> List[int] | None:
+    # The right solution is just the left solution of the mirrored line
+    starts = left_starts(hint[::-1], mirror(filled, length), mirror(empty, length), length)
+    if starts is None:
+        return None
+    return [length - start - seg for start, seg in zip(reversed(starts), hint)]
+
+
+def overlap_masks(hint: Sequence[int], left: Sequence[int], right: Sequence[int], length: int) -> Masks:
+    """
+    Cells covered by the same segment in both the left and right solutions are filled,
+    and cells sitting in the same gap in both solutions are empty.
+    """
+    filled = empty = 0
+    for seg, l, r in zip(hint, left, right):
+        if l + seg > r:
+            filled |= span(r, l + seg - r)
+
+    # Gap g sits between segment g - 1 and segment g
+    gap_starts = [0] + [r + seg for r, seg in zip(right, hint)]
+    gap_ends = [*left, length]
+    for start, end in zip(gap_starts, gap_ends):
+        if end > start:
+            empty |= span(start, end - start)
+    return filled, empty
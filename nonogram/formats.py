@@ -0,0 +1,139 @@
+"""
+Importers for puzzle formats used outside this repo. Each gives back (row_hints, col_hints),
+the same hints read_hints returns and Game takes.
+
+.non files (Steve Simpson's format) are keyword lines like "width 5" followed by "rows" and "columns"
+sections with one comma separated clue per line.
+webpbn XML files hold a <puzzleset> of <puzzle>s, each with <clues type="rows"> and <clues type="columns">
+made of <line>s of <count>s.
+"""
+import html.entities
+import os
+import xml.etree.ElementTree as ET
+from typing import Iterator, List, Tuple
+from nonogram.binary import BINARY_SUFFIX, BinaryTrace
+from nonogram.parse import Hints, read_hints, read_solution
+from nonogram.state import SolutionStep, Step
+
+# Everything read_puzzle understands
+PUZZLE_SUFFIXES = (".txt", ".non", ".xml", BINARY_SUFFIX)
+
+
+def parse_clue(file_name, line_no: int, clue: str) -> List[int]:
+    # "3,1,2", "3 1 2" and "0" are all fine, an empty clue is an empty line
+    try:
+        return [int(x) for x in clue.replace(",", " ").split()]
+    except ValueError:
+        raise ValueError(f"{file_name}:{line_no}: clue must be numbers separated by commas, got {clue!r}") from None
+
+
+def read_non(file_name) -> Tuple[Hints, Hints]:
+    """
+    Reads the hints of a .non file one line at a time, skipping every keyword it doesn't need (title, goal, ...).
+    When width and height are given exactly that many clues are read, so blank lines count as empty clues,
+    otherwise a section ends at the first blank line.
+    """
+    sizes = {}
+    sections = {}
+    with open(file_name, "r") as f:
+        lines = enumerate(f, 1)
+        for line_no, line in lines:
+            words = line.split()
+            if not words or words[0].startswith("#"):
+                continue
+            keyword = words[0]
+            match keyword:
+                case "width" | "height":
+                    if len(words) != 2 or not words[1].isdigit():
+                        raise ValueError(f"{file_name}:{line_no}: expected '{keyword} <number>'")
+                    sizes[keyword] = int(words[1])
+                case "rows" | "columns":
+                    count = sizes.get("height" if keyword == "rows" else "width")
+                    clues = []
+                    for line_no, line in lines:
+                        clue = line.strip()
+                        if not clue and count is None:
+                            break
+                        clues.append(parse_clue(file_name, line_no, clue) or [0])
+                        if len(clues) == count:
+                            break
+                    if count is not None and len(clues) != count:
+                        raise ValueError(f"{file_name}: {keyword} has {len(clues)} clues, expected {count}")
+                    sections[keyword] = clues
+
+    if "rows" not in sections or "columns" not in sections:
+        raise ValueError(f"{file_name} needs both a rows and a columns section")
+    return sections["rows"], sections["columns"]
+
+
+def xml_parser() -> ET.XMLParser:
+    # webpbn files use HTML entities like &copy; that plain XML doesn't define
+    parser = ET.XMLParser()
+    parser.entity.update((name, chr(codepoint)) for name, codepoint in html.entities.name2codepoint.items())
+    return parser
+
+
+def iter_webpbn(file_name) -> Iterator[Tuple[Hints, Hints]]:
+    """
+    Yields the hints of every puzzle in a webpbn XML file as soon as the puzzle is parsed.
+    Each finished <puzzle> is cleared again, so big puzzle sets never build a full tree.
+    Only black and white puzzles are supported.
+    """
+    clues = {}
+    colors = 0
+    for _, element in ET.iterparse(file_name, events=("end",), parser=xml_parser()):
+        match element.tag:
+            case "color":
+                colors += 1
+            case "clues":
+                clue_type = element.get("type")
+                if clue_type not in {"rows", "columns"}:
+                    raise ValueError(f"{file_name}: unknown clue type {clue_type!r}")
+                hints = []
+                for line in element.iter("line"):
+                    hints.append([int(count.text) for count in line.iter("count")] or [0])
+                clues[clue_type] = hints
+            case "puzzle":
+                if element.get("type", "grid") != "grid":
+                    raise ValueError(f"{file_name}: only grid puzzles are supported")
+                # The background is a color too, so black and white puzzles list at most 2
+                if colors > 2:
+                    raise ValueError(f"{file_name}: only black and white puzzles are supported")
+                if "rows" not in clues or "columns" not in clues:
+                    raise ValueError(f"{file_name}: puzzle needs both rows and columns clues")
+                yield clues["rows"], clues["columns"]
+                clues = {}
+                colors = 0
+                element.clear()
+
+
+def read_webpbn(file_name) -> Tuple[Hints, Hints]:
+    # First puzzle in the file
+    for hints in iter_webpbn(file_name):
+        return hints
+    raise ValueError(f"{file_name} has no puzzles")
+
+
+def read_puzzle(file_name) -> Tuple[Hints, Hints]:
+    """Hints of a puzzle in any supported format, picked by file extension"""
+    match os.path.splitext(file_name)[1].lower():
+        case ".non":
+            return read_non(file_name)
+        case ".xml":
+            return read_webpbn(file_name)
+        case ".ngb":
+            return BinaryTrace(file_name).hints()
+        case _:
+            return read_hints(file_name)
+
+
+def read_trace(file_name) -> Tuple[Hints, Hints, Iterator[Step | SolutionStep]]:
+    """Hints and lazily read steps of any supported file, imported puzzles come with no steps"""
+    match os.path.splitext(file_name)[1].lower():
+        case ".ngb":
+            trace = BinaryTrace(file_name)
+            return (*trace.hints(), trace.iter_raw_steps())
+        case ".non" | ".xml":
+            return (*read_puzzle(file_name), iter(()))
+        case _:
+            return read_solution(file_name)
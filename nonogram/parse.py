@@ -0,0 +1,166 @@
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+from nonogram.state import SolutionStep, SquareState, Step
+
+Hints = List[List[int]]
+# (line number, contents with the comment and surrounding whitespace removed)
+NumberedLine = Tuple[int, str]
+
+# Symbol for each state when writing, indexed by SquareState value
+SYMBOLS = "_ox"
+SQUARE_STATES: Dict[str, SquareState] = {
+    "o": SquareState.FILLED,
+    "x": SquareState.EMPTY,
+    "_": SquareState.UNKOWN,
+}
+
+
+class ParseError(ValueError):
+    # line_no is None when there's no line to point at, like an empty file
+    def __init__(self, file_name, line_no: int | None, message: str) -> None:
+        super().__init__(f"{file_name}:{line_no}: {message}" if line_no is not None else f"{file_name}: {message}")
+        self.file_name = file_name
+        self.line_no = line_no
+
+
+def normalize_hint(hint: Sequence[int]) -> List[int]:
+    # Empty lines are written as a single 0 in hint files
+    return [seg for seg in hint if seg]
+
+
+def parse_square(square: str) -> SquareState:
+    try:
+        return SQUARE_STATES[square.strip()]
+    except KeyError:
+        raise ValueError(f"{square} is not 'o', 'x', or '_'") from None
+
+
+def numbered_lines(f) -> Iterator[NumberedLine]:
+    """
+    Lines of an open file with comments and trailing whitespace (\\r included) stripped.
+    Blank lines come through as "" since they separate the hint blocks,
+    lines that only hold a comment are skipped entirely.
+    """
+    for line_no, raw in enumerate(f, 1):
+        line, hash_, _ = raw.partition("#")
+        line = line.strip()
+        if line or not hash_:
+            yield line_no, line
+
+
+def read_hint_block(file_name, lines: Iterator[NumberedLine], name: str, line_no: int = 0) -> Tuple[Hints, int, bool]:
+    """
+    Reads hints up to the next blank line.
+    Also returns the number of the last line read (line_no if there were none left), and False if the file ended before a blank line.
+    """
+    hints = []
+    for line_no, line in lines:
+        if not line:
+            # Blank lines before a block starts are just extra spacing
+            if hints:
+                return hints, line_no, True
+            continue
+        try:
+            hint = [int(x) for x in line.split()]
+        except ValueError:
+            raise ParseError(file_name, line_no, f"{name} hint must be whole numbers separated by spaces, got {line!r}") from None
+        if any(seg < 0 for seg in hint):
+            raise ParseError(file_name, line_no, f"{name} hint can't be negative")
+        hints.append(hint)
+    return hints, line_no, False
+
+
+def read_hint_blocks(file_name, lines: Iterator[NumberedLine]) -> Tuple[Hints, Hints, int]:
+    """
+    Reads the row and then the column hints, along with the number of the last line they took up.
+    A block only comes back empty when the file ran out, so those errors point at the last line there was.
+    """
+    row_hints, line_no, more = read_hint_block(file_name, lines, "row")
+    if not row_hints:
+        raise ParseError(file_name, line_no or None, "unexpected end of file, missing row hints")
+    if not more:
+        raise ParseError(file_name, line_no, "file ends before the blank line between the row and column hints")
+    col_hints, line_no, _ = read_hint_block(file_name, lines, "column", line_no)
+    if not col_hints:
+        raise ParseError(file_name, line_no, "unexpected end of file, missing column hints")
+    return row_hints, col_hints, line_no
+
+
+def read_hints(file_name) -> Tuple[Hints, Hints]:
+    """Reads the row and column hint blocks at the top of a puzzle or solution file, ignoring any steps"""
+    with open(file_name, "r") as f:
+        return read_hint_blocks(file_name, numbered_lines(f))[:2]
+
+
+def parse_step(file_name, line_no: int, line: str, n_rows: int, n_cols: int) -> SolutionStep:
+    parts = line.split()
+    if len(parts) < 2:
+        raise ParseError(file_name, line_no, f"expected '<index> row|col <cells>', got {line!r}")
+    index, direction, *squares = parts
+    if direction not in {"row", "col"}:
+        raise ParseError(file_name, line_no, f"direction must be 'row' or 'col', got {direction!r}")
+    count, length = (n_rows, n_cols) if direction == "row" else (n_cols, n_rows)
+    if not index.isdigit() or int(index) >= count:
+        raise ParseError(file_name, line_no, f"{direction} index must be between 0 and {count - 1}, got {index!r}")
+    if len(squares) != length:
+        raise ParseError(file_name, line_no, f"{direction} needs {length} cells, got {len(squares)}")
+    try:
+        states = [SQUARE_STATES[square] for square in squares]
+    except KeyError as e:
+        raise ParseError(file_name, line_no, f"{e.args[0]!r} is not 'o', 'x', or '_'") from None
+    return states, int(index), direction
+
+
+def parse_steps(file_name, hints_end: int, n_rows: int, n_cols: int) -> Iterator[SolutionStep]:
+    # Opens the file only once the steps are asked for and closes it when they run out or the generator is closed,
+    # the hint lines up to hints_end were already parsed and are skipped
+    with open(file_name, "r") as f:
+        for line_no, line in numbered_lines(f):
+            if line and line_no > hints_end:
+                yield parse_step(file_name, line_no, line, n_rows, n_cols)
+
+
+def iter_steps(file_name) -> Iterator[SolutionStep]:
+    """
+    Lazily yields the steps of a solution file one line at a time, checking each against the hints,
+    so even huge traces never have to be held in memory.
+    """
+    yield from read_solution(file_name)[2]
+
+
+def read_solution(file_name) -> Tuple[Hints, Hints, Iterator[SolutionStep]]:
+    """
+3 # Row Hints
+1 1
+1
+
+2 # Col Hints
+1 1
+2
+
+0 row o o o # Solution
+0 col o o x
+2 col o o x
+1 row o x o
+2 row x o x
+
+    The hints are read straight away, the steps come from a generator that reads the file as it's consumed.
+    Nothing is left open if the steps are never read.
+    """
+    with open(file_name, "r") as f:
+        row_hints, col_hints, hints_end = read_hint_blocks(file_name, numbered_lines(f))
+    return row_hints, col_hints, parse_steps(file_name, hints_end, len(row_hints), len(col_hints))
+
+
+def format_step(step: Step | SolutionStep) -> str:
+    line, i, direction = step
+    return f"{i} {direction} " + " ".join(SYMBOLS[getattr(square, "value", square)] for square in line)
+
+
+def write_solution_file(file_name, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], steps: Iterable[Step | SolutionStep]):
+    with open(file_name, "w") as f:
+        for hints in (row_hints, col_hints):
+            for hint in hints:
+                f.write(" ".join(str(seg) for seg in hint or [0]) + "\n")
+            f.write("\n")
+        for step in steps:
+            f.write(format_step(step) + "\n")
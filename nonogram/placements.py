@@ -0,0 +1,72 @@
+from typing import Iterator, List, Sequence, Tuple
+from nonogram.bitline import to_masks
+from nonogram.parse import normalize_hint
+
+# Every placement is a tuple holding the start index of each segment
+
+
+def placement_counts(length: int, hint: Sequence[int], line: Sequence[int] | None = None) -> List[List[int]]:
+    """
+    counts[j][p] is the number of ways segments j onwards can be placed when the next segment
+    may start at p at the earliest, while respecting the known cells of line.
+    """
+    hint = normalize_hint(hint)
+    if line is not None and len(line) != length:
+        raise ValueError("line must have the given length")
+    filled, empty = to_masks(line) if line is not None else (0, 0)
+
+    n_segs = len(hint)
+    counts = [[0] * (length + 1) for _ in range(n_segs + 1)]
+    # After the last segment there is exactly one way to finish, as long as nothing is filled
+    for p in range(length + 1):
+        counts[n_segs][p] = 0 if filled >> p else 1
+
+    for j in range(n_segs - 1, -1, -1):
+        seg = hint[j]
+        seg_mask = (1 << seg) - 1
+        for p in range(length - seg, -1, -1):
+            end = p + seg
+            # Either leave p as a gap, or start segment j right here
+            total = 0 if filled >> p & 1 else counts[j][p + 1]
+            if not empty >> p & seg_mask and not filled >> end & 1:
+                total += counts[j + 1][min(end + 1, length)]
+            counts[j][p] = total
+    return counts
+
+
+def count_placements(length: int, hint: Sequence[int], line: Sequence[int] | None = None) -> int:
+    return placement_counts(length, hint, line)[0][0]
+
+
+def placements(length: int, hint: Sequence[int], line: Sequence[int] | None = None) -> Iterator[Tuple[int, ...]]:
+    """
+    Lazily yields every valid placement in lexicographic order.
+    The counts table is used to skip any start position that can't lead to a full placement,
+    so nothing is generated just to be thrown away.
+    """
+    hint = normalize_hint(hint)
+    counts = placement_counts(length, hint, line)
+    filled, empty = to_masks(line) if line is not None else (0, 0)
+
+    def place(seg_i: int, pos: int) -> Iterator[Tuple[int, ...]]:
+        if seg_i == len(hint):
+            yield ()
+            return
+        seg = hint[seg_i]
+        seg_mask = (1 << seg) - 1
+        for start in range(pos, length - seg + 1):
+            # No ways left from here on
+            if not counts[seg_i][start]:
+                return
+            end = start + seg
+            next_pos = min(end + 1, length)
+            fits = not empty >> start & seg_mask and not filled >> end & 1
+            if fits and counts[seg_i + 1][next_pos]:
+                for rest in place(seg_i + 1, next_pos):
+                    yield (start, *rest)
+            # A filled cell can't be skipped over
+            if filled >> start & 1:
+                return
+
+    if counts[0][0]:
+        yield from place(0, 0)
@@ -0,0 +1,15 @@
+from enum import Enum
+from typing import List, Literal, Tuple
+
+
+class SquareState(Enum):
+    UNKOWN = 0
+    FILLED = 1
+    EMPTY = 2
+
+
+Direction = Literal["row"] | Literal["col"]
+# One line of a solution: the new cells, which row or column it is, and whether it's a row or a column
+SolutionStep = Tuple[List[SquareState], int, Direction]
+# The same with plain int cells, which is what the solvers produce
+Step = Tuple[List[int], int, Direction]
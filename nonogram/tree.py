@@ -0,0 +1,162 @@
+from typing import Iterable, List, Sequence, Tuple
+import numpy as np
+
+# Vertices of a placement tree are tuples of segment starts, with None for segments not placed yet
+
+
+def generate_nodes_from_leaves(leaf_nodes: Sequence[tuple]):
+    # Use a set to avoid duplicate nodes
+    all_nodes = set(leaf_nodes)
+
+    # Find the maximum depth (length of tuples)
+    if not leaf_nodes:
+        return []
+
+    max_depth = len(leaf_nodes[0])
+
+    # Generate ancestor nodes for each level
+    for level in range(max_depth - 1, 0, -1):
+        current_level_nodes = set()
+
+        # For each existing node that has a value at the current level
+        for node in all_nodes:
+            # Create parent by replacing values with None from current level onwards
+            parent = list(node[:level])
+            while len(parent) < max_depth:
+                parent.append(None)
+            current_level_nodes.add(tuple(parent))
+
+        # Add these parent nodes to our collection
+        all_nodes.update(current_level_nodes)
+
+    # Convert back to list and sort by level order and then by values
+    def sort_key(node):
+        # Count non-None values for level
+        level = sum(1 for val in node if val is not None)
+        # Use the values themselves as secondary sort key
+        return (level, node)
+
+    return [tuple(None for _ in range(max_depth))] + sorted(all_nodes, key=sort_key)
+
+def edge_list_from_nodes(nodes: Sequence[tuple]):
+    # Helper function to get the level of a node (count of non-None values)
+    def get_level(node):
+        return sum(1 for val in node if val is not None)
+
+    # A node's parent is the same node with its last placed segment taken back off
+    def parent_of(node):
+        for i in range(len(node) - 1, -1, -1):
+            if node[i] is not None:
+                return node[:i] + (None,) + node[i + 1:]
+        return None
+
+    # Sort nodes by level and then by values
+    sorted_nodes = sorted(nodes, key=lambda node: (get_level(node), [val if val is not None else -float('inf') for val in node]))
+    node_set = set(sorted_nodes)
+
+    # Generate edges, every lookup is a single hash instead of a scan over all nodes
+    edges = []
+    for child in sorted_nodes:
+        parent = parent_of(child)
+        # Skip the root node as it has no parent
+        if parent is not None and parent in node_set:
+            edges.append((parent, child))
+
+    return edges
+
+
+def tree_from_leaves(leaf_nodes: Iterable[tuple]) -> Tuple[List[tuple], List[Tuple[tuple, tuple]]]:
+    """
+    Builds every vertex and edge of a placement tree in a single pass over the leaves.
+    Leaves are inserted into a prefix trie as they stream in, then the trie is walked one level
+    at a time, so the vertices come out in level order without scanning or sorting anything.
+    For leaves in sorted order (like placements yields them) the output matches
+    generate_nodes_from_leaves and edge_list_from_nodes exactly.
+    """
+    trie = {}
+    depth = None
+    for leaf in leaf_nodes:
+        if depth is None:
+            depth = len(leaf)
+        children = trie
+        for pos in leaf:
+            children = children.setdefault(pos, {})
+
+    if depth is None:
+        return [], []
+
+    root = tuple(None for _ in range(depth))
+    nodes = [root]
+    edges = []
+    # Each entry is the placed prefix of a vertex, its full key, and its children in the trie
+    level = [((), root, trie)]
+    for level_i in range(1, depth + 1):
+        padding = root[level_i:]
+        next_level = []
+        for prefix, parent, children in level:
+            for pos, grandchildren in children.items():
+                child_prefix = prefix + (pos,)
+                child = child_prefix + padding
+                nodes.append(child)
+                edges.append((parent, child))
+                next_level.append((child_prefix, child, grandchildren))
+        level = next_level
+
+    return nodes, edges
+
+
+def tree_layout(vertices: Sequence[tuple], spacing: Tuple[float, float] = (1.0, 1.0), balanced: bool = True) -> np.ndarray:
+    """
+    Position of every vertex of a placement tree as an (x, y, 0) row, in the same order as vertices.
+    The depth of a vertex is just how many segments its key has placed, and leaves are spread evenly
+    from left to right in the order they come in, so vertices must be in level order like tree_from_leaves gives them.
+    Balanced trees center each vertex over all the leaves under it, so big subtrees get room in proportion to their size,
+    otherwise a vertex is centered between its first and last child.
+    Everything is done in a couple of passes over the vertices, the whole layout ends up centered on the origin.
+    """
+    n = len(vertices)
+    positions = np.zeros((n, 3))
+    if n == 0:
+        return positions
+
+    index = {vertex: i for i, vertex in enumerate(vertices)}
+    depth = np.zeros(n)
+    children: List[List[int]] = [[] for _ in range(n)]
+    roots = []
+    for i, vertex in enumerate(vertices):
+        placed = [seg for seg, pos in enumerate(vertex) if pos is not None]
+        depth[i] = len(placed)
+        # Same as edge_list_from_nodes, the parent has the last placed segment taken back off
+        parent = index.get(vertex[:placed[-1]] + (None,) + vertex[placed[-1] + 1:]) if placed else None
+        if parent is None:
+            roots.append(i)
+        else:
+            children[parent].append(i)
+
+    # Depth first so leaves are numbered left to right
+    preorder = []
+    stack = roots[::-1]
+    while stack:
+        i = stack.pop()
+        preorder.append(i)
+        stack.extend(reversed(children[i]))
+
+    # Going backwards through the preorder every child is done before its parent
+    x = np.zeros(n)
+    first_leaf = np.zeros(n)
+    last_leaf = np.zeros(n)
+    n_leaves = 0
+    for i in preorder:
+        if not children[i]:
+            first_leaf[i] = last_leaf[i] = x[i] = n_leaves
+            n_leaves += 1
+    for i in reversed(preorder):
+        if children[i]:
+            first, last = children[i][0], children[i][-1]
+            first_leaf[i], last_leaf[i] = first_leaf[first], last_leaf[last]
+            x[i] = (first_leaf[i] + last_leaf[i]) / 2 if balanced else (x[first] + x[last]) / 2
+
+    positions[:, 0] = x * spacing[0]
+    positions[:, 1] = -depth * spacing[1]
+    positions[:, :2] -= (positions[:, :2].max(axis=0) + positions[:, :2].min(axis=0)) / 2
+    return positions
@@ -1,7 +1,16 @@
-from itertools import product
-from typing import List
-from manim import BLACK, BLUE, DOWN, LEFT, ORIGIN, RED, RIGHT, UP, Arrow, Create, Cross, FadeIn, LaggedStart, Rectangle, Scene, Text, Transform, Uncreate, VGroup
-from puzzle import CellScanner, Line, gen_square_mark
+import logging
+from typing import List, Sequence
+from manim import BLACK, BLUE, DOWN, GREEN, LEFT, ORANGE, ORIGIN, PINK, PURPLE, RED, RIGHT, TEAL, UP, YELLOW, Arrow, Create, Cross, FadeIn, LaggedStart, ParsableManimColor, Rectangle, Scene, Text, Transform, Uncreate, VGroup
+from nonogram import SquareState
+from nonogram.bitline import EMPTY, UNKNOWN, overlap_masks
+from nonogram.parse import SYMBOLS
+from nonogram.placements import count_placements, placements
+from puzzle import CellScanner, Line, LineTemplate, gen_square_mark, states_to_cells
+from solver import left_solution, right_solution
+from timeline import Timeline
+from text_cache import cached_text
+
+logger = logging.getLogger(__name__)
 
 class OverlapAlg(Scene):
     def construct(self):
@@ -26,10 +35,10 @@ class OverlapAlg(Scene):
         right_line.move_segment_to(0, 2)
         right_line.move_segment_to(1, 6)
 
-        initial_text = Text("Initial State")
-        left_text = Text("Left Solution")
-        right_text = Text("Right Solution")
-        sol_text = Text("New Overlap")
+        initial_text = cached_text("Initial State")
+        left_text = cached_text("Left Solution")
+        right_text = cached_text("Right Solution")
+        sol_text = cached_text("New Overlap")
 
         initial_line.shift(UP*2.2)
         right_line.shift(DOWN*1.1)
@@ -59,10 +68,9 @@ class OverlapAlg(Scene):
             FadeIn(solution_line, whacky_arrow, sol_text, shift=DOWN*1.1),
             lag_ratio=0.5))
 
-        self.play(Create(scanner))
-
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline = Timeline()
+        timeline.add(Create(scanner))
+        timeline.scan(scanner, RIGHT*ratio, cells=2)
 
         top_blue_copy1 = left_line.segment_group[0][2].copy()
         bot_blue_copy1 = right_line.segment_group[0][0].copy()
@@ -70,12 +78,9 @@ class OverlapAlg(Scene):
         sol_square1 = gen_square_mark(ratio, 0.8)
         sol_square1.set_color(BLUE)
         sol_square1.move_to(solution_line.squares_group[2])
-        self.play(Transform(top_blue_copy1, sol_square1), Transform(bot_blue_copy1, sol_square1))
+        timeline.add(Transform(top_blue_copy1, sol_square1), Transform(bot_blue_copy1, sol_square1))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio, cells=4)
 
         top_blue_copy2 = left_line.segment_group[1][2].copy()
         bot_blue_copy2 = right_line.segment_group[1][0].copy()
@@ -83,9 +88,9 @@ class OverlapAlg(Scene):
         sol_square2 = gen_square_mark(ratio, 0.8)
         sol_square2.set_color(RED)
         sol_square2.move_to(solution_line.squares_group[6])
-        self.play(Transform(top_blue_copy2, sol_square2), Transform(bot_blue_copy2, sol_square2))
+        timeline.add(Transform(top_blue_copy2, sol_square2), Transform(bot_blue_copy2, sol_square2))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio)
 
         top_blue_copy3 = left_line.segment_group[1][3].copy()
         bot_blue_copy3 = right_line.segment_group[1][1].copy()
@@ -93,11 +98,11 @@ class OverlapAlg(Scene):
         sol_square3 = gen_square_mark(ratio, 0.8)
         sol_square3.set_color(RED)
         sol_square3.move_to(solution_line.squares_group[7])
-        self.play(Transform(top_blue_copy3, sol_square3), Transform(bot_blue_copy3, sol_square3))
+        timeline.add(Transform(top_blue_copy3, sol_square3), Transform(bot_blue_copy3, sol_square3))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(Uncreate(scanner))
+        timeline.scan(scanner, RIGHT*ratio, cells=2)
+        timeline.add(Uncreate(scanner))
+        timeline.play(self)
         print(all_obj.height)
         self.wait(3)
 
@@ -130,10 +135,10 @@ class OverlapExplain(Scene):
 
         right_line = left_line.copy()
 
-        initial_text = Text("Initial State")
-        left_text = Text("Left Solution")
-        right_text = Text("Right Solution")
-        sol_text = Text("New Overlap")
+        initial_text = cached_text("Initial State")
+        left_text = cached_text("Left Solution")
+        right_text = cached_text("Right Solution")
+        sol_text = cached_text("New Overlap")
 
         initial_line.shift(UP*2.2)
         right_line.shift(DOWN*1.1)
@@ -177,117 +182,45 @@ class OverlapExplain(Scene):
 
 class AllPermutations(Scene):
     def construct(self):
-        lines = VGroup()
-        total = 0
-        ignored = 0
-        actual = 0
         LEFT = 2
         RIGHT = 3
         LEN = 10
-        NUM_POSITIONS = LEN - (LEFT + RIGHT)
-        print(NUM_POSITIONS)
-        for l, r in product(range(0, NUM_POSITIONS), range(LEFT + 1, LEFT + 1 + NUM_POSITIONS)):
-            total += 1
-            if l + LEFT + 1 > r:
-                ignored += 1
-                continue
-            line = Line([LEFT, RIGHT], length=LEN)
-            line.set_hint_color(0, BLUE)
-            line.set_hint_color(1, RED)
-
-            line.create_segments(LEFT, RIGHT)
-
-            line.set_seg_color(0, BLUE)
-            line.set_seg_color(1, RED)
-
-            line.move_segment_to(0, l)
-            line.move_segment_to(1, r)
-            lines.add(line)
-            actual += 1
-        print(total, ignored, actual)
-        print(len(range(0, 5)), len(range(3, 8)))
+        hint = [LEFT, RIGHT]
+        # Every line is a copy of this one with the segments moved
+        template = LineTemplate(placed_line(hint, LEN, SEGMENT_COLORS[:2], [0, LEFT + 1], show_xs=False))
+        lines = template.instances(placements(LEN, hint))
         lines.arrange(DOWN)
         lines.move_to(ORIGIN)
         lines.scale_to_fit_height(7.5)
         self.add(lines)
 
 def calc_permutations(length, hint: List[int]):
-    from itertools import product
-    def print_line(length, hint: List[int], positions: List[int]):
+    # Logs every placement drawn out as text, then how many there were next to what count_placements says
+    def format_line(length, hint: List[int], positions: Sequence[int]) -> str:
         line = "_" * length
         assert len(hint) == len(positions)
         for (seg_i, seg), pos in zip(enumerate(hint), positions):
             line = line[:pos] + str(seg_i) * seg + line[pos + seg:]
-        print(line)
+        return line
 
-    def check_line(length, hint: List[int], positions: List[int]):
-        line = "_" * length
-        assert len(hint) == len(positions)
-        for (seg_i, seg), pos in zip(enumerate(hint), positions):
-            start = positions[seg_i - 1] + hint[seg_i - 1] + 1 if seg_i else 0
-            if any((cell != "_" for cell in line[start:start+seg])):
-                return False
-            line = line[:pos] + str(seg_i) * seg + line[pos + seg:]
-        return True
-
-    # print_line(length, hint, [0, 3])
-    hint_sum = sum(hint)
-    hint_len = len(hint)
-    num_positions = length - hint_sum
-    position_ranges = []
-    for i, seg in enumerate(hint):
-        preceding = hint[hint_len - i:]
-        start = sum(preceding) + len(preceding) - 1 if preceding else 0
-        end = start + num_positions
-        position_ranges.append(range(start, end))
-
-    total = 0
-    ignored = 0
+    # placements only ever yields valid positions, so nothing gets thrown away anymore
     actual = 0
-    for positions in product(*position_ranges):
-        total += 1
-        if not check_line(length, hint, list(positions)):
-            ignored += 1
-            continue
-        print_line(length, hint, list(positions))
+    for positions in placements(length, hint):
+        logger.debug(format_line(length, hint, positions))
         actual += 1
-    print(total, ignored, actual)
+    logger.debug("%d placements, %d counted", actual, count_placements(length, hint))
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     calc_permutations(10, [2, 3])
 
 class AllPositions(Scene):
-    from itertools import product
     def construct(self):
-        left_lines = VGroup()
-        for l in range(0, 5):
-            line = Line([2, 3], length=10)
-            line.set_hint_color(0, BLUE)
-            line.set_hint_color(1, RED)
-
-            line.create_segments(2, 3)
-
-            line.set_seg_color(0, BLUE)
-            line.set_seg_color(1, RED)
-
-            line.move_segment_to(0, l)
-            line.move_segment_to(1, 7)
-            left_lines.add(line)
+        hint = [2, 3]
+        template = LineTemplate(placed_line(hint, 10, SEGMENT_COLORS[:2], [0, 7], show_xs=False))
+        left_lines = template.instances((l, 7) for l in range(0, 5))
         left_lines.arrange(DOWN)
-        right_lines = VGroup()
-        for r in range(3, 8):
-            line = Line([2, 3], length=10)
-            line.set_hint_color(0, BLUE)
-            line.set_hint_color(1, RED)
-
-            line.create_segments(2, 3)
-
-            line.set_seg_color(0, BLUE)
-            line.set_seg_color(1, RED)
-
-            line.move_segment_to(0, 0)
-            line.move_segment_to(1, r)
-            right_lines.add(line)
+        right_lines = template.instances((0, r) for r in range(3, 8))
         right_lines.arrange(DOWN)
         all_lines = VGroup()
         all_lines.add(left_lines, right_lines)
@@ -327,10 +260,10 @@ class OverlapX(Scene):
         right_line.move_segment_to(0, 1)
         right_line.move_segment_to(1, 6)
 
-        initial_text = Text("Initial State")
-        left_text = Text("Left Solution")
-        right_text = Text("Right Solution")
-        sol_text = Text("New Overlap")
+        initial_text = cached_text("Initial State")
+        left_text = cached_text("Left Solution")
+        right_text = cached_text("Right Solution")
+        sol_text = cached_text("New Overlap")
 
         initial_line.shift(UP*2.2)
         right_line.shift(DOWN*1.1)
@@ -372,9 +305,10 @@ class OverlapX(Scene):
             FadeIn(solution_line, whacky_arrow, sol_text, shift=DOWN*1.1),
             lag_ratio=0.5))
 
-        self.play(Create(scanner))
+        timeline = Timeline()
+        timeline.add(Create(scanner))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio)
 
         top_blue_copy1 = left_line.segment_group[0][1].copy()
         bot_blue_copy1 = right_line.segment_group[0][0].copy()
@@ -382,10 +316,9 @@ class OverlapX(Scene):
         sol_square1 = gen_square_mark(ratio, 0.8)
         sol_square1.set_color(BLUE)
         sol_square1.move_to(solution_line.squares_group[1])
-        self.play(Transform(top_blue_copy1, sol_square1), Transform(bot_blue_copy1, sol_square1))
+        timeline.add(Transform(top_blue_copy1, sol_square1), Transform(bot_blue_copy1, sol_square1))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio, cells=2)
 
         top_x_copy1 = left_xs[1].copy()
         bot_x_copy1 = right_xs[1].copy()
@@ -393,9 +326,9 @@ class OverlapX(Scene):
         sol_x1 = top_x_copy1.copy()
         sol_x1.move_to(solution_line.squares_group[3])
 
-        self.play(Transform(top_x_copy1, sol_x1), Transform(bot_x_copy1, sol_x1))
+        timeline.add(Transform(top_x_copy1, sol_x1), Transform(bot_x_copy1, sol_x1))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio)
 
         top_x_copy2 = left_xs[2].copy()
         bot_x_copy2 = right_xs[2].copy()
@@ -403,10 +336,9 @@ class OverlapX(Scene):
         sol_x2 = top_x_copy1.copy()
         sol_x2.move_to(solution_line.squares_group[4])
 
-        self.play(Transform(top_x_copy2, sol_x2), Transform(bot_x_copy2, sol_x2))
+        timeline.add(Transform(top_x_copy2, sol_x2), Transform(bot_x_copy2, sol_x2))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio, cells=2)
 
         top_red_copy1 = left_line.segment_group[1][1].copy()
         bot_red_copy1 = right_line.segment_group[1][0].copy()
@@ -414,9 +346,9 @@ class OverlapX(Scene):
         sol_square2 = gen_square_mark(ratio, 0.8)
         sol_square2.set_color(RED)
         sol_square2.move_to(solution_line.squares_group[6])
-        self.play(Transform(top_red_copy1, sol_square2), Transform(bot_red_copy1, sol_square2))
+        timeline.add(Transform(top_red_copy1, sol_square2), Transform(bot_red_copy1, sol_square2))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio)
 
         top_red_copy2 = left_line.segment_group[1][2].copy()
         bot_red_copy2 = right_line.segment_group[1][1].copy()
@@ -424,9 +356,9 @@ class OverlapX(Scene):
         sol_square3 = gen_square_mark(ratio, 0.8)
         sol_square3.set_color(RED)
         sol_square3.move_to(solution_line.squares_group[7])
-        self.play(Transform(top_red_copy2, sol_square3), Transform(bot_red_copy2, sol_square3))
+        timeline.add(Transform(top_red_copy2, sol_square3), Transform(bot_red_copy2, sol_square3))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
+        timeline.scan(scanner, RIGHT*ratio)
 
         top_red_copy3 = left_line.segment_group[1][3].copy()
         bot_red_copy3 = right_line.segment_group[1][2].copy()
@@ -434,9 +366,166 @@ class OverlapX(Scene):
         sol_square4 = gen_square_mark(ratio, 0.8)
         sol_square4.set_color(RED)
         sol_square4.move_to(solution_line.squares_group[8])
-        self.play(Transform(top_red_copy3, sol_square4), Transform(bot_red_copy3, sol_square4))
+        timeline.add(Transform(top_red_copy3, sol_square4), Transform(bot_red_copy3, sol_square4))
 
-        self.play(scanner.animate.shift_by_cell(RIGHT*ratio))
-        self.play(Uncreate(scanner))
+        timeline.scan(scanner, RIGHT*ratio)
+        timeline.add(Uncreate(scanner))
+        timeline.play(self)
         print(all_obj.height)
         self.wait(3)
+
+# Segment colors in hint order, the first two match the hand made overlap scenes
+SEGMENT_COLORS = [BLUE, RED, GREEN, YELLOW, PURPLE, ORANGE, TEAL, PINK]
+
+def colored_line(hint: List[int], length: int, colors: List[ParsableManimColor], initial_line: Sequence[int] | None = None) -> Line:
+    if initial_line is None:
+        line = Line(hint, length=length)
+    else:
+        line = Line(hint, initial_line=states_to_cells([SquareState(square) for square in initial_line]))
+    for i, color in enumerate(colors):
+        line.set_hint_color(i, color)
+    return line
+
+def uncovered(hint: List[int], starts: List[int], length: int) -> List[int]:
+    # Cells no segment covers when the segments start at starts
+    covered = {cell for seg, start in zip(hint, starts) for cell in range(start, start + seg)}
+    return [cell for cell in range(length) if cell not in covered]
+
+def placed_line(hint: List[int], length: int, colors: List[ParsableManimColor], starts: List[int], show_xs: bool) -> Line:
+    # One of the left or right solutions, with crosses on every cell it leaves empty
+    line = colored_line(hint, length, colors)
+    line.create_segments(*hint)
+    for i, (color, start) in enumerate(zip(colors, starts)):
+        line.set_seg_color(i, color)
+        line.move_segment_to(i, start)
+    if show_xs:
+        line.set_xs(uncovered(hint, starts, length))
+    return line
+
+class OverlapScanner(Scene):
+    """
+    OverlapAlg and OverlapX for any line. The left and right solutions come from the solver, and the scanner
+    walks the whole line copying every cell the overlap method finds down into the new overlap.
+    Subclass it and set hint, length and initial_line, or make one with overlap_scene.
+    """
+    hint: List[int] = [3, 4]
+    length: int = 10
+    # Known cells as solver values, UNKNOWN/FILLED/EMPTY
+    initial_line: List[int] | None = None
+    # Crosses for the empty cells, by default only when there's an initial line to get them from
+    show_xs: bool | None = None
+
+    def construct(self):
+        hint, length = self.hint, self.length
+        known = list(self.initial_line) if self.initial_line is not None else [UNKNOWN] * length
+        left = left_solution(hint, known)
+        right = right_solution(hint, known)
+        if left is None or right is None:
+            raise ValueError(f"No placement of {hint} fits the line")
+        filled, empty = overlap_masks(hint, left, right, length)
+        show_xs = self.initial_line is not None if self.show_xs is None else self.show_xs
+        colors = [SEGMENT_COLORS[i % len(SEGMENT_COLORS)] for i in range(len(hint))]
+
+        all_obj = VGroup()
+        initial_line = colored_line(hint, length, colors, self.initial_line)
+        left_line = placed_line(hint, length, colors, left, show_xs)
+        right_line = placed_line(hint, length, colors, right, show_xs)
+        solution_line = colored_line(hint, length, colors)
+
+        initial_text = cached_text("Initial State")
+        left_text = cached_text("Left Solution")
+        right_text = cached_text("Right Solution")
+        sol_text = cached_text("New Overlap")
+
+        initial_line.shift(UP*2.2)
+        right_line.shift(DOWN*1.1)
+        solution_line.shift(3.3 * DOWN)
+
+        initial_text.next_to(initial_line, LEFT)
+        left_text.next_to(left_line, LEFT)
+        right_text.next_to(right_line, LEFT)
+        sol_text.next_to(solution_line, LEFT)
+
+        scanner = CellScanner(left_line.squares_group[0], solution_line.squares_group[0])
+        scanner.set_z_index(3)
+
+        whacky_arrow = Arrow(start=right_line.get_critical_point(DOWN), end=solution_line.get_critical_point(UP))
+        whacky_arrow2 = Arrow(start=initial_line.get_critical_point(DOWN), end=left_line.get_critical_point(UP))
+
+        all_obj.add(initial_line, left_line, right_line, solution_line, scanner, initial_text, left_text, right_text, sol_text, whacky_arrow, whacky_arrow2)
+        all_obj.move_to(ORIGIN)
+        original_width = all_obj.width
+        all_obj.scale_to_fit_width(14)
+        ratio = all_obj.width/original_width
+
+        self.play(LaggedStart(
+            FadeIn(initial_line, initial_text),
+            FadeIn(left_line, whacky_arrow2, left_text, shift=DOWN*1.1),
+            FadeIn(right_line, right_text, shift=DOWN*1.1),
+            FadeIn(solution_line, whacky_arrow, sol_text, shift=DOWN*1.1),
+            lag_ratio=0.5))
+
+        # Which segment covers each filled overlap cell, it's the same one in both solutions
+        owner = {cell: i for i, (seg, l, r) in enumerate(zip(hint, left, right)) for cell in range(r, l + seg)}
+        left_xs = dict(zip(uncovered(hint, left, length), left_line.xs_group))
+        right_xs = dict(zip(uncovered(hint, right, length), right_line.xs_group))
+
+        timeline = Timeline()
+        timeline.add(Create(scanner))
+        for cell in range(length):
+            if cell:
+                timeline.scan(scanner, RIGHT*ratio)
+            if filled >> cell & 1:
+                seg = owner[cell]
+                top_copy = left_line.segment_group[seg][cell - left[seg]].copy()
+                bot_copy = right_line.segment_group[seg][cell - right[seg]].copy()
+                sol_mark = gen_square_mark(ratio, 0.8)
+                sol_mark.set_color(colors[seg])
+            elif show_xs and empty >> cell & 1:
+                top_copy = left_xs[cell].copy()
+                bot_copy = right_xs[cell].copy()
+                sol_mark = top_copy.copy()
+            else:
+                continue
+            sol_mark.move_to(solution_line.squares_group[cell])
+            timeline.add(Transform(top_copy, sol_mark), Transform(bot_copy, sol_mark))
+        timeline.add(Uncreate(scanner))
+        timeline.play(self)
+        self.wait(3)
+
+def overlap_scene(hint: List[int], length: int | None = None, initial_line: Sequence[int] | None = None, show_xs: bool | None = None, name: str | None = None) -> type[OverlapScanner]:
+    """
+    An OverlapScanner for one line.
+    Without a name it's named after everything that changes the clip so a batch of them render to separate files,
+    the known cells in the solution file's symbols and show_xs as a suffix when it's set.
+    Assign it to a module level name (the same as name, if given) so manim and render_all can find it.
+    """
+    if initial_line is not None:
+        length = len(initial_line)
+    elif length is None:
+        raise ValueError("initial_line or length must be specified")
+    known = list(initial_line) if initial_line is not None else [UNKNOWN] * length
+    if left_solution(hint, known) is None:
+        raise ValueError(f"No placement of {hint} fits the line")
+    if name is None:
+        name = f"Overlap_{'_'.join(map(str, hint))}_{length}"
+        if initial_line is not None:
+            name += "_" + "".join(SYMBOLS[square] for square in known)
+        if show_xs is not None:
+            name += "_xs" if show_xs else "_no_xs"
+    attributes = {"hint": list(hint), "length": length, "initial_line": known if initial_line is not None else None, "show_xs": show_xs}
+    return type(name, (OverlapScanner,), attributes)
+
+class OverlapThreeSegments(OverlapScanner):
+    hint = [4, 1, 3]
+    length = 12
+
+class OverlapKnownX(OverlapScanner):
+    hint = [3, 2]
+    initial_line = [UNKNOWN, UNKNOWN, UNKNOWN, EMPTY, UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN]
+    length = len(initial_line)
+
+# The known gap of OverlapKnownX moved along the line, render_all finds these from the assignments
+Overlap_3_2_8_a = overlap_scene([3, 2], initial_line=[UNKNOWN, UNKNOWN, UNKNOWN, EMPTY, UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN], name="Overlap_3_2_8_a")
+Overlap_3_2_8_b = overlap_scene([3, 2], initial_line=[UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN, EMPTY, UNKNOWN, UNKNOWN, UNKNOWN], name="Overlap_3_2_8_b")
+Overlap_3_2_8_c = overlap_scene([3, 2], initial_line=[UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN, UNKNOWN, EMPTY, UNKNOWN, UNKNOWN], name="Overlap_3_2_8_c")
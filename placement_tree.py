@@ -1,94 +1,16 @@
-from mimetypes import init
-from typing import Hashable, List, Sequence, Tuple, override
-from click.core import F
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple, override
+import numpy as np
 from manim import DOWN, RIGHT, UP, Cross, DiGraph, Dot, ManimColor, Mobject, ParsableManimColor, Square, SurroundingRectangle, Text, VGroup, VMobject
 from manim.mobject.graph import GenericGraph
-from puzzle import CELL_SIZE, Cell, Hint, SquareState, gen_square_mark
+from nonogram import SquareState, tree_from_leaves, tree_layout
+from puzzle import CELL_SIZE, Cell, Hint, gen_square_mark
+from text_cache import cached_text
 
 FILLED = SquareState.FILLED
 
 # def generate_all_solutions(initial_line: List[Cell]) -> Iterable[tuple]:
 #     pass
 
-def generate_nodes_from_leaves(leaf_nodes: Sequence[tuple]):
-    # Use a set to avoid duplicate nodes
-    all_nodes = set(leaf_nodes)
-
-    # Find the maximum depth (length of tuples)
-    if not leaf_nodes:
-        return []
-
-    max_depth = len(leaf_nodes[0])
-
-    # Generate ancestor nodes for each level
-    for level in range(max_depth - 1, 0, -1):
-        current_level_nodes = set()
-
-        # For each existing node that has a value at the current level
-        for node in all_nodes:
-            # Create parent by replacing values with None from current level onwards
-            parent = list(node[:level])
-            while len(parent) < max_depth:
-                parent.append(None)
-            current_level_nodes.add(tuple(parent))
-
-        # Add these parent nodes to our collection
-        all_nodes.update(current_level_nodes)
-
-    # Convert back to list and sort by level order and then by values
-    def sort_key(node):
-        # Count non-None values for level
-        level = sum(1 for val in node if val is not None)
-        # Use the values themselves as secondary sort key
-        return (level, node)
-
-    return [tuple(None for _ in range(max_depth))] + sorted(all_nodes, key=sort_key)
-
-def edge_list_from_nodes(nodes: Sequence[tuple]):
-        # Helper function to get the level of a node (count of non-None values)
-    def get_level(node):
-        return sum(1 for val in node if val is not None)
-
-    # Helper function to check if one node is a parent of another
-    def is_parent(potential_parent, potential_child):
-        parent_level = get_level(potential_parent)
-        child_level = get_level(potential_child)
-
-        # Parent should have exactly one fewer non-None value
-        if child_level != parent_level + 1:
-            return False
-
-        # For the root node (all None), any first-level node is a child
-        if all(val is None for val in potential_parent):
-            return child_level == 1
-
-        # All non-None values in parent should match the child's corresponding values
-        parent_values = [i for i, val in enumerate(potential_parent) if val is not None]
-        for idx in parent_values:
-            if potential_parent[idx] != potential_child[idx]:
-                return False
-
-        return True
-
-    # Sort nodes by level and then by values
-    # sorted_nodes = sorted(nodes, key=lambda node: (get_level(node), node))
-    sorted_nodes = sorted(nodes, key=lambda node: (get_level(node), [val if val is not None else -float('inf') for val in node]))
-
-    # Generate edges
-    edges = []
-    for i, child in enumerate(sorted_nodes):
-        child_level = get_level(child)
-        if child_level == 0:  # Skip the root node as it has no parent
-            continue
-
-        # Find the parent node
-        for potential_parent in sorted_nodes:
-            if is_parent(potential_parent, child):
-                edges.append((potential_parent, child))
-                break
-
-    return edges
-
 
 CELL_SIZE = 1.0
 class StaticCell(Square):
@@ -97,13 +19,26 @@ class StaticCell(Square):
         self.cell_size = cell_size
 
         self.state = state
-        self.square_mark = gen_square_mark(cell_size)
-        self.x_mark = Cross(self, z_index=2, scale_factor=0.7)
+        # At most one mark is ever shown, so neither is built until it's needed
+        self._square_mark: Square | None = None
+        self._x_mark: Cross | None = None
         if state == SquareState.FILLED:
             self.add(self.square_mark)
         elif state == SquareState.EMPTY:
             self.add(self.x_mark)
 
+    @property
+    def square_mark(self) -> Square:
+        if self._square_mark is None:
+            self._square_mark = gen_square_mark(self.width)
+        return self._square_mark
+
+    @property
+    def x_mark(self) -> Cross:
+        if self._x_mark is None:
+            self._x_mark = Cross(self, z_index=2, scale_factor=0.7)
+        return self._x_mark
+
     def set_state(self, state: SquareState):
         match state:
             case SquareState.FILLED:
@@ -156,20 +91,30 @@ class PlacementTreeNode(LineCells):
             self.place_seg(seg_index, pos, colors[seg_index])
 
 
+def placement_layout(vertices: Sequence[Tuple[int | None, ...]], spacing: Tuple[float, float], balanced: bool = True) -> Dict[Tuple[int | None, ...], np.ndarray]:
+    # Graph takes a position per vertex instead of running networkx for layout="tree"
+    return dict(zip(vertices, tree_layout(vertices, spacing, balanced)))
+
+
 class PlacementTree(DiGraph):
     def __init__(
             self,
-            placements: Sequence[Tuple[int | None, ...]],
+            placements: Iterable[Tuple[int | None, ...]],
             hint: List[int],
             initial_states: List[SquareState] | None = None,
             length: int | None = None,
+            spacing: Tuple[float, float] | None = None,
             *args,
             **kwargs
     ) -> None:
         # Each vertex in the tree is keyed by a tuple with a length of the number of segments
         # Each value is the index in the array where the corresponding segment is placed, and None if not placed
-        vertext_keys = generate_nodes_from_leaves(placements)
-        edges = edge_list_from_nodes(vertext_keys)
+        # placements can be any stream of leaves, they are only walked once
+        vertext_keys, edges = tree_from_leaves(placements)
+        # By default leaves are a cell apart and levels are two cells apart
+        if spacing is None:
+            line_length = len(initial_states) if initial_states else length
+            spacing = ((line_length or 0) + 1, 2)
 
         n_segs = len(hint)
         self.colors = [ManimColor.from_hsv((i / n_segs, 1.0, 1.0)) for i in range(n_segs)]
@@ -190,9 +135,8 @@ class PlacementTree(DiGraph):
         super().__init__(
             vertext_keys,
             edges,
-            layout="tree",
+            layout=placement_layout(vertext_keys, spacing),
             vertex_type=PlacementTreeNode,
-            root_vertex=vertext_keys[0],
             vertex_config=self.vertex_config,
             *args,
             **kwargs
@@ -200,7 +144,7 @@ class PlacementTree(DiGraph):
 
         self.hint_obj.next_to(self, UP, buff=1)
         self.hint_box = SurroundingRectangle(self.hint_obj, buff=0.2)
-        self.hint_label = Text("Hint").next_to(self.hint_box, UP)
+        self.hint_label = cached_text("Hint").next_to(self.hint_box, UP)
         self.add(self.hint_obj, self.hint_box, self.hint_label)
 
     @override
@@ -0,0 +1,236 @@
+import argparse
+import itertools
+import math
+import os
+import time
+from typing import Iterable, Iterator, List, Sequence, Tuple
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from nonogram.bitline import EMPTY, FILLED, UNKNOWN
+from nonogram.formats import read_trace
+from nonogram.state import SolutionStep, Step
+from solver import Contradiction, dp_solve, solve
+
+# Same look as the manim scenes: white outlines and squares on black, red crosses
+BACKGROUND = (0, 0, 0)
+OUTLINE = (255, 255, 255)
+SQUARE = (255, 255, 255)
+CROSS = (252, 98, 85)
+# Marks take up the same share of a cell as gen_square_mark and Cross(scale_factor=0.7)
+MARK_RATIO = 0.7
+# Frames of the contact sheet are this many pixels apart, and scaled down to fit in a square this big
+SHEET_GAP = 8
+SHEET_THUMBNAIL = 400
+
+
+def blank_tile(cell_size: int) -> np.ndarray:
+    tile = np.zeros((cell_size, cell_size, 3), dtype=np.uint8)
+    tile[:] = BACKGROUND
+    width = max(1, cell_size // 16)
+    tile[:width] = tile[-width:] = tile[:, :width] = tile[:, -width:] = OUTLINE
+    return tile
+
+
+def state_tiles(cell_size: int) -> np.ndarray:
+    """One tile per state, indexed by state value, so a whole grid is drawn with a single lookup"""
+    tiles = np.stack([blank_tile(cell_size)] * 3)
+    margin = round(cell_size * (1 - MARK_RATIO) / 2)
+    inner = slice(margin, cell_size - margin)
+    tiles[FILLED][inner, inner] = SQUARE
+
+    y, x = np.indices((cell_size, cell_size))
+    thickness = max(1.0, cell_size / 12)
+    in_box = (x >= margin) & (x < cell_size - margin) & (y >= margin) & (y < cell_size - margin)
+    diagonals = (np.abs(x - y) <= thickness / 2) | (np.abs(x + y - (cell_size - 1)) <= thickness / 2)
+    tiles[EMPTY][in_box & diagonals] = CROSS
+    return tiles
+
+
+def number_tile(value: int | None, cell_size: int, font: ImageFont.ImageFont | None) -> np.ndarray:
+    tile = blank_tile(cell_size)
+    if value is None or font is None:
+        return tile
+    image = Image.fromarray(tile)
+    ImageDraw.Draw(image).text((cell_size / 2, cell_size / 2), str(value), fill=OUTLINE, font=font, anchor="mm")
+    return np.asarray(image)
+
+
+def load_font(cell_size: int) -> ImageFont.ImageFont | None:
+    # Numbers would just be noise in tiny cells
+    if cell_size < 8:
+        return None
+    try:
+        return ImageFont.load_default(size=int(cell_size * 0.6))
+    except TypeError:
+        # Pillow before 10.1 only has the one fixed size bitmap font
+        return ImageFont.load_default()
+
+
+def tile_grid(tiles: np.ndarray) -> np.ndarray:
+    # (rows, cols, size, size, 3) -> (rows * size, cols * size, 3)
+    rows, cols, size, _, channels = tiles.shape
+    return tiles.transpose(0, 2, 1, 3, 4).reshape(rows * size, cols * size, channels)
+
+
+class Preview:
+    """
+    Draws grid states straight into a NumPy image without building any mobjects.
+    The hints are drawn once into a base image, after that every frame is one tile lookup on the state array.
+    """
+    def __init__(self, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], cell_size: int = 16) -> None:
+        self.rows, self.cols = len(row_hints), len(col_hints)
+        self.cell_size = cell_size
+        self.tiles = state_tiles(cell_size)
+        self.grid = np.full((self.rows, self.cols), UNKNOWN, dtype=np.uint8)
+
+        # Hints are padded at the start like Hint does, so the numbers line up against the grid
+        row_depth = max(len(hint) for hint in row_hints)
+        col_depth = max(len(hint) for hint in col_hints)
+        self.origin = (col_depth * cell_size, row_depth * cell_size)
+        self.base = np.zeros(((col_depth + self.rows) * cell_size, (row_depth + self.cols) * cell_size, 3), dtype=np.uint8)
+        self.base[:] = BACKGROUND
+
+        font = load_font(cell_size)
+        numbers = {value: number_tile(value, cell_size, font) for hint in (*row_hints, *col_hints) for value in (None, *hint)}
+        row_tiles = np.stack([[numbers[value] for value in [None] * (row_depth - len(hint)) + list(hint)] for hint in row_hints])
+        col_tiles = np.stack([[numbers[value] for value in [None] * (col_depth - len(hint)) + list(hint)] for hint in col_hints])
+        top, left = self.origin
+        self.base[top:, :left] = tile_grid(row_tiles)
+        self.base[:top, left:] = tile_grid(col_tiles.transpose(1, 0, 2, 3, 4))
+
+    def apply(self, step: Step | SolutionStep):
+        line, i, direction = step
+        values = [getattr(square, "value", square) for square in line]
+        if direction == "row":
+            self.grid[i] = values
+        else:
+            self.grid[:, i] = values
+
+    def frame(self) -> np.ndarray:
+        image = self.base.copy()
+        top, left = self.origin
+        image[top:, left:] = tile_grid(self.tiles[self.grid])
+        return image
+
+    def frames(self, steps: Iterable[Step | SolutionStep], every: int = 1) -> Iterator[Tuple[int, np.ndarray]]:
+        """Replays steps, yielding (steps applied, image) every few steps and always for the final state"""
+        n = 0
+        for n, step in enumerate(steps, 1):
+            self.apply(step)
+            if n % every == 0:
+                yield n, self.frame()
+        if n % every:
+            yield n, self.frame()
+
+
+def contact_sheet(frames: List[Tuple[int, np.ndarray]]) -> Image.Image:
+    # Frames in a roughly square grid, each labeled with how many steps it took to get there
+    height, width, _ = frames[0][1].shape
+    scale = min(1.0, SHEET_THUMBNAIL / max(height, width))
+    height, width = max(1, round(height * scale)), max(1, round(width * scale))
+    label_height = 14
+    columns = math.ceil(math.sqrt(len(frames)))
+    rows = math.ceil(len(frames) / columns)
+    sheet = Image.new("RGB", (columns * (width + SHEET_GAP) + SHEET_GAP, rows * (height + label_height + SHEET_GAP) + SHEET_GAP), (40, 40, 40))
+    draw = ImageDraw.Draw(sheet)
+    for k, (n, frame) in enumerate(frames):
+        x = SHEET_GAP + k % columns * (width + SHEET_GAP)
+        y = SHEET_GAP + k // columns * (height + label_height + SHEET_GAP)
+        draw.text((x, y), f"step {n}", fill=OUTLINE)
+        sheet.paste(Image.fromarray(frame).resize((width, height), Image.Resampling.BOX), (x, y + label_height))
+    return sheet
+
+
+def line_hint(line: np.ndarray) -> List[int]:
+    # Lengths of the runs of filled cells
+    padded = np.concatenate(([False], line == FILLED, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return (edges[1::2] - edges[::2]).tolist()
+
+
+def check_grid(grid: np.ndarray, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]]) -> List[str]:
+    """Every way the final grid is unfinished or a finished line disagrees with its hint"""
+    problems = []
+    unknown = int(np.count_nonzero(grid == UNKNOWN))
+    if unknown:
+        problems.append(f"{unknown} cells are still unknown")
+    for direction, lines, hints in (("row", grid, row_hints), ("col", grid.T, col_hints)):
+        for i, (line, hint) in enumerate(zip(lines, hints)):
+            # Lines that aren't finished yet can't be checked
+            if not (line == UNKNOWN).any() and line_hint(line) != [seg for seg in hint if seg]:
+                problems.append(f"{direction} {i} is {line_hint(line)} but the hint is {list(hint)}")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quick preview of a solution trace without rendering it with manim")
+    parser.add_argument("trace", help="Solution trace (.txt or .ngb), or a .non/.xml puzzle which is solved first")
+    parser.add_argument("output", nargs="?", help="PNG of the final state, defaults to the trace name with .png")
+    parser.add_argument("--cell-size", type=int, help="Pixels per cell, picked from the puzzle size by default")
+    parser.add_argument("--every", type=int, default=1, help="Only keep every nth step as a frame")
+    parser.add_argument("--frames", help="Directory to write every kept frame to as a PNG")
+    parser.add_argument("--gif", help="Write the kept frames as an animated GIF")
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--sheet", help="Write a contact sheet of evenly spaced frames")
+    parser.add_argument("--sheet-frames", type=int, default=16)
+    args = parser.parse_args()
+
+    row_hints, col_hints, steps = read_trace(args.trace)
+    first = next(steps, None)
+    if first is None:
+        # Nothing to replay, so show what line solving gets out of the puzzle
+        try:
+            _, solved = solve(row_hints, col_hints, dp_solve)
+        except Contradiction as e:
+            print(f"puzzle has no solution: {e}")
+            solved = []
+        steps = iter(solved)
+    else:
+        steps = itertools.chain([first], steps)
+
+    cell_size = args.cell_size or max(4, min(32, 1200 // (max(len(hint) for hint in row_hints) + len(col_hints))))
+    preview = Preview(row_hints, col_hints, cell_size)
+    start = time.perf_counter()
+    n_frames = 0
+    gif_frames: List[Image.Image] = []
+    # Sheet frames get thinned out as the trace goes on, so memory stays bounded without knowing how long it is
+    sheet_frames: List[Tuple[int, np.ndarray]] = []
+    sheet_stride = 1
+    if args.frames:
+        os.makedirs(args.frames, exist_ok=True)
+    if args.frames or args.gif or args.sheet:
+        for n, frame in preview.frames(steps, args.every):
+            if args.frames:
+                Image.fromarray(frame).save(os.path.join(args.frames, f"frame_{n:06d}.png"))
+            if args.gif:
+                gif_frames.append(Image.fromarray(frame).convert("P", palette=Image.Palette.ADAPTIVE, colors=32))
+            if args.sheet and n_frames % sheet_stride == 0:
+                sheet_frames.append((n, frame))
+                if len(sheet_frames) > 2 * args.sheet_frames:
+                    sheet_frames = sheet_frames[::2]
+                    sheet_stride *= 2
+            n_frames += 1
+            last = (n, frame)
+        # The sheet always ends on the final state
+        if sheet_frames and sheet_frames[-1][0] != last[0]:
+            sheet_frames.append(last)
+    else:
+        for step in steps:
+            preview.apply(step)
+
+    final = preview.frame()
+    output = args.output or os.path.splitext(args.trace)[0] + ".png"
+    Image.fromarray(final).save(output)
+    if gif_frames:
+        gif_frames[0].save(args.gif, save_all=True, append_images=gif_frames[1:], duration=1000 / args.fps, loop=0)
+    if sheet_frames:
+        picks = np.unique(np.linspace(0, len(sheet_frames) - 1, min(args.sheet_frames, len(sheet_frames))).round().astype(int))
+        contact_sheet([sheet_frames[k] for k in picks]).save(args.sheet)
+    elapsed = time.perf_counter() - start
+
+    print(f"{n_frames} frames in {elapsed:.3f}s, final state written to {output}")
+    problems = check_grid(preview.grid, row_hints, col_hints)
+    for problem in problems:
+        print(problem)
+    if not problems:
+        print("final grid matches every hint")
@@ -1,12 +1,9 @@
-from enum import Enum
-from typing import Any, Generator, Iterable, List, Literal, Sequence, Tuple
-from manim import BLUE, DOWN, LEFT, RIGHT, UP, WHITE, Animation, AnimationGroup, Arrow, Circle, Cross, DiGraph, FadeIn, FadeOut, Mobject, ParsableManimColor, Rectangle, Square, Succession, SurroundingRectangle, Text, VGroup, VMobject, np, ManimColor
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Generator, Iterable, List, Literal, Sequence, Tuple
+from manim import BLUE, DL, DOWN, DR, LEFT, RED, RIGHT, UL, UP, UR, WHITE, Animation, AnimationGroup, Arrow, Circle, Cross, DiGraph, FadeIn, FadeOut, Mobject, ParsableManimColor, Rectangle, Square, Succession, SurroundingRectangle, Text, VGroup, VMobject, linear, np, smooth, ManimColor
 from manim.typing import Point3DLike, Vector3D
-
-class SquareState(Enum):
-    UNKOWN = 0
-    FILLED = 1
-    EMPTY = 2
+from nonogram import SquareState
+from text_cache import cached_text
 
 def gen_square_mark(outer_size, inner_ratio = 0.7):
     return Square(side_length=outer_size * inner_ratio, color=WHITE, z_index=1, fill_opacity=1, stroke_opacity=0)
@@ -19,16 +16,29 @@ class Cell(VMobject):
 
         self.state = SquareState.UNKOWN
         self.background = Square(side_length=cell_size, z_index=0)
-        self.x_mark = Cross(self.background, z_index=2, scale_factor=0.7)
-        self.square_mark = gen_square_mark(cell_size)
-
-        self.square_mark.set_opacity(0)
-        self.x_mark.set_opacity(0)
-
-        self.x_mark.move_to(self.background.get_center())
-        self.square_mark.move_to(self.background.get_center())
-        self.add(self.background, self.x_mark, self.square_mark)
+        # Marks are only built the first time they're used, most cells never need both
+        self._x_mark: Cross | None = None
+        self._square_mark: Square | None = None
+        self.add(self.background)
 
+    # Marks are sized from the background so they still fit if the cell was scaled before they were made
+    @property
+    def x_mark(self) -> Cross:
+        if self._x_mark is None:
+            self._x_mark = Cross(self.background, z_index=2, scale_factor=0.7)
+            self._x_mark.set_opacity(0)
+            self._x_mark.move_to(self.background.get_center())
+            self.add(self._x_mark)
+        return self._x_mark
+
+    @property
+    def square_mark(self) -> Square:
+        if self._square_mark is None:
+            self._square_mark = gen_square_mark(self.background.width)
+            self._square_mark.set_opacity(0)
+            self._square_mark.move_to(self.background.get_center())
+            self.add(self._square_mark)
+        return self._square_mark
 
     # This is a sep function from set_state to provide consistent compound animations
     def animated_set_state(self, state: SquareState) -> Animation | None:
@@ -36,8 +46,9 @@ class Cell(VMobject):
         self.state = state
 
         # I dont know why these need to be called in this function
-        self.x_mark.move_to(self.background.get_center())
-        self.square_mark.move_to(self.background.get_center())
+        for mark in (self._x_mark, self._square_mark):
+            if mark is not None:
+                mark.move_to(self.background.get_center())
 
         match (old_state, state):
             case (SquareState.UNKOWN, SquareState.FILLED):
@@ -109,18 +120,264 @@ class Grid(VMobject):
         cell = self.get_cell(row, col)
         return cell.animated_set_state(state)
 
+    # Instantly applies states without animating, same as BatchedGrid.set_cell_states
+    def set_cell_states(self, cells: Iterable[Tuple[int, int, SquareState]]):
+        for row, col, state in cells:
+            self.get_cell(row, col).set_state(state)
+
     def set_line(self, line: List[SquareState | None], i: int, direction: Literal["row"] | Literal["col"]) -> Generator[Animation]:
+        changes = []
         for (j, square) in enumerate(line):
             if not square:
                 continue
 
-            if direction == "row":
-                animation = self.set_cell_state(i, j, square)
-            else:
-                animation = self.set_cell_state(j, i, square)
+            cell = self.get_cell(i, j) if direction == "row" else self.get_cell(j, i)
+            if cell.state != square:
+                changes.append((cell, square))
+
+        # The whole line is one animation, it staggers the cells itself like a LaggedStart would
+        if changes:
+            yield LineFill(self, changes) # YA THATS RIGHT, A GENERATOR
+
+
+class StaggeredMarks(Animation, ABC):
+    """
+    Base for animating many cells' marks at once from arrays instead of one animation per cell.
+    Each cell runs for one unit of time, starting lag_ratio after the previous one, the same
+    timing a LaggedStart of per cell animations has. A cell swapping its square for a cross
+    (or the other way) hides the old mark in the first half and shows the new one in the second.
+    Subclasses apply the resulting per cell amounts of square and cross to their mobject.
+    """
+    def __init__(self, mobject: Mobject, fill_from: np.ndarray, fill_to: np.ndarray, cross_from: np.ndarray, cross_to: np.ndarray, lag_ratio: float = 0.15, rate_func: Callable[[float], float] = smooth, **kwargs):
+        self.fill_from = fill_from
+        self.fill_to = fill_to
+        self.cross_from = cross_from
+        self.cross_to = cross_to
+        self.swap = ((fill_from > 0) & (cross_to > 0)) | ((cross_from > 0) & (fill_to > 0))
+
+        self.offsets = np.arange(len(fill_from)) * lag_ratio
+        self.total = 1 + self.offsets[-1]
+        kwargs.setdefault("run_time", self.total)
+        # rate_func eases every cell on its own, the same as it would each animation of a LaggedStart,
+        # so the animation as a whole has to run linearly
+        self.ease = np.vectorize(rate_func, otypes=[float])
+        super().__init__(mobject, rate_func=linear, **kwargs)
+
+    # Marks are updated in place, so there is no need for a copy to interpolate from
+    def create_starting_mobject(self) -> Mobject:
+        return Mobject()
+
+    def interpolate_mobject(self, alpha: float) -> None:
+        t = np.clip(alpha * self.total - self.offsets, 0, 1)
+        eased = self.ease(t)
+        hiding = self.ease(np.clip(2 * t, 0, 1))
+        showing = self.ease(np.clip(2 * t - 1, 0, 1))
+
+        fill_alpha = np.where(self.swap, np.where(self.fill_to > self.fill_from, showing, hiding), eased)
+        cross_alpha = np.where(self.swap, np.where(self.cross_to > self.cross_from, showing, hiding), eased)
+        self.apply_marks(
+            self.fill_from + (self.fill_to - self.fill_from) * fill_alpha,
+            self.cross_from + (self.cross_to - self.cross_from) * cross_alpha,
+        )
+
+    @abstractmethod
+    def apply_marks(self, fill: np.ndarray, cross: np.ndarray):
+        """Shows fill of each cell's square and cross of its cross, both between 0 and 1"""
+
+
+class LineFill(StaggeredMarks):
+    """
+    Sets a run of Cells in a Grid at once, interpolating all their mark opacities from one array.
+    Opacities are set directly on the marks, no copied target mobject is made per cell.
+    """
+    def __init__(self, grid: Grid, cells: List[Tuple[Cell, SquareState]], lag_ratio: float = 0.15, **kwargs):
+        old_states = [cell.state for cell, _ in cells]
+        new_states = [state for _, state in cells]
+        fill_from = np.array([state == SquareState.FILLED for state in old_states], dtype=float)
+        cross_from = np.array([state == SquareState.EMPTY for state in old_states], dtype=float)
+        fill_to = np.array([state == SquareState.FILLED for state in new_states], dtype=float)
+        cross_to = np.array([state == SquareState.EMPTY for state in new_states], dtype=float)
+
+        # Only the marks that actually change are touched, so no unneeded mark gets built
+        self.square_marks = [cell.square_mark if start or end else None for (cell, _), start, end in zip(cells, fill_from, fill_to)]
+        self.x_marks = [cell.x_mark if start or end else None for (cell, _), start, end in zip(cells, cross_from, cross_to)]
+        for (cell, _), square_mark, x_mark in zip(cells, self.square_marks, self.x_marks):
+            for mark in (square_mark, x_mark):
+                if mark is not None:
+                    mark.move_to(cell.background.get_center())
+        self.last_fill = np.full(len(cells), -1.0)
+        self.last_cross = np.full(len(cells), -1.0)
+        super().__init__(grid, fill_from, fill_to, cross_from, cross_to, lag_ratio, **kwargs)
+
+        # Like Cell.animated_set_state, the state is updated as soon as the animation is made
+        for cell, state in cells:
+            cell.state = state
+
+    def apply_marks(self, fill: np.ndarray, cross: np.ndarray):
+        # Cells that haven't started or have already finished don't need touching again
+        for i in np.flatnonzero(fill != self.last_fill):
+            if self.square_marks[i] is not None:
+                self.square_marks[i].set_opacity(fill[i])
+        for i in np.flatnonzero(cross != self.last_cross):
+            if self.x_marks[i] is not None:
+                self.x_marks[i].set_opacity(cross[i])
+        self.last_fill = fill
+        self.last_cross = cross
+
+
+# Corners of a unit square around the origin, in the same order Square uses
+UNIT_SQUARE = np.array([UR, UL, DL, DR]) / 2
+# The two strokes of a Cross fitted to a unit square
+UNIT_CROSS_STARTS = np.array([UL, UR]) / 2
+UNIT_CROSS_ENDS = np.array([DR, DL]) / 2
+
+
+def straight_curves(starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Cubic bezier points for straight lines from each start to each end, same as set_points_as_corners
+    t = np.array([0, 1 / 3, 2 / 3, 1]).reshape(-1, 1)
+    curves = starts[..., np.newaxis, :] + (ends - starts)[..., np.newaxis, :] * t
+    return curves.reshape(-1, 3)
+
+
+# Stand-in for a Cell inside a BatchedGrid, all of the state lives in the grid's arrays
+class BatchedCell:
+    def __init__(self, grid: "BatchedGrid", row: int, col: int) -> None:
+        self.grid = grid
+        self.row = row
+        self.col = col
+
+    @property
+    def state(self) -> SquareState:
+        return SquareState(int(self.grid.states[self.row, self.col]))
+
+    def get_center(self) -> np.ndarray:
+        return self.grid.cell_centers()[self.row, self.col]
+
+    def animated_set_state(self, state: SquareState) -> Animation | None:
+        return self.grid.set_cell_state(self.row, self.col, state)
+
+    def set_state(self, state: SquareState):
+        self.grid.set_cell_states([(self.row, self.col, state)])
+
+
+class BatchedGrid(VMobject):
+    """
+    Drop in replacement for Grid that stores cell states in a NumPy array.
+    All backgrounds, square marks and crosses are drawn as one VMobject each, with every cell
+    a separate subpath, so a 100x100 puzzle is 3 mobjects instead of 30,000.
+    """
+    def __init__(self, rows: int, cols: int, cell_size = CELL_SIZE, **kwargs):
+        super().__init__(**kwargs)
+
+        self.rows = rows
+        self.cols = cols
+        self.states = np.full((rows, cols), SquareState.UNKOWN.value, dtype=np.uint8)
+        # How much of each mark is currently drawn, 0 is hidden and 1 is full size
+        self.fill_scale = np.zeros((rows, cols))
+        self.cross_scale = np.zeros((rows, cols))
+
+        # Centered on the origin like a Grid arranged with arrange_in_grid
+        col_offsets = (np.arange(cols) - (cols - 1) / 2) * cell_size
+        row_offsets = ((rows - 1) / 2 - np.arange(rows)) * cell_size
+        centers = col_offsets[np.newaxis, :, np.newaxis] * RIGHT + row_offsets[:, np.newaxis, np.newaxis] * UP
+
+        self.background = VMobject(stroke_color=WHITE, z_index=0)
+        corners = centers.reshape(-1, 1, 3) + UNIT_SQUARE * cell_size
+        self.background.set_points(straight_curves(corners, np.roll(corners, -1, axis=1)))
+        self.square_marks = VMobject(fill_color=WHITE, fill_opacity=1, stroke_opacity=0, z_index=1)
+        self.x_marks = VMobject(stroke_color=RED, stroke_width=6, z_index=2)
+
+        self.add(self.background, self.square_marks, self.x_marks)
+
+    # Cell geometry always comes from the background so it follows any shift or scale of the grid
+    def cell_width(self) -> float:
+        return self.background.width / self.cols
+
+    def cell_centers(self) -> np.ndarray:
+        size = self.cell_width()
+        top_left = self.background.get_corner(UL)
+        col_offsets = (np.arange(self.cols) + 0.5) * size
+        row_offsets = (np.arange(self.rows) + 0.5) * size
+        return top_left + col_offsets[np.newaxis, :, np.newaxis] * RIGHT + row_offsets[:, np.newaxis, np.newaxis] * DOWN
+
+    def draw_marks(self):
+        centers = self.cell_centers()
+        size = self.cell_width()
+
+        shown = self.fill_scale > 0
+        scales = (self.fill_scale[shown] * size * 0.7).reshape(-1, 1, 1)
+        corners = centers[shown].reshape(-1, 1, 3) + UNIT_SQUARE * scales
+        self.square_marks.set_points(straight_curves(corners, np.roll(corners, -1, axis=1)))
+
+        shown = self.cross_scale > 0
+        scales = (self.cross_scale[shown] * size * 0.7).reshape(-1, 1, 1)
+        cell_centers = centers[shown].reshape(-1, 1, 3)
+        self.x_marks.set_points(straight_curves(cell_centers + UNIT_CROSS_STARTS * scales, cell_centers + UNIT_CROSS_ENDS * scales))
+
+    def get_cell(self, row: int, col: int) -> BatchedCell:
+        if row < 0 or row >= self.rows or col < 0 or col >= self.cols:
+            raise IndexError(f"Position ({row}, {col}) is outside the grid bounds")
+
+        return BatchedCell(self, row, col)
 
-            if animation:
-                yield animation # YA THATS RIGHT, A GENERATOR
+    # Instantly applies states without animating
+    def set_cell_states(self, cells: Iterable[Tuple[int, int, SquareState]]):
+        for row, col, state in cells:
+            self.states[row, col] = state.value
+        self.fill_scale = (self.states == SquareState.FILLED.value).astype(float)
+        self.cross_scale = (self.states == SquareState.EMPTY.value).astype(float)
+        self.draw_marks()
+
+    def set_cell_state(self, row: int, col: int, state: SquareState) -> Animation | None:
+        self.get_cell(row, col)
+        if self.states[row, col] == state.value:
+            return None
+        return GridTransition(self, [(row, col, state)])
+
+    def set_line(self, line: List[SquareState | None], i: int, direction: Literal["row"] | Literal["col"]) -> Generator[Animation]:
+        changes = []
+        for (j, square) in enumerate(line):
+            if not square:
+                continue
+            row, col = (i, j) if direction == "row" else (j, i)
+            self.get_cell(row, col)
+            if self.states[row, col] != square.value:
+                changes.append((row, col, square))
+
+        # The whole line is a single animation, it already staggers the cells like a LaggedStart
+        if changes:
+            yield GridTransition(self, changes)
+
+
+class GridTransition(StaggeredMarks):
+    """
+    Animates a batch of BatchedGrid cells changing state at once.
+    Marks grow out of and shrink into their cell centers instead of fading,
+    since every cell shares the same few VMobjects.
+    """
+    def __init__(self, grid: BatchedGrid, cells: List[Tuple[int, int, SquareState]], lag_ratio: float = 0.15, **kwargs):
+        self.grid = grid
+        self.rows = np.array([row for row, _, _ in cells], dtype=int)
+        self.cols = np.array([col for _, col, _ in cells], dtype=int)
+        new_states = np.array([state.value for _, _, state in cells], dtype=np.uint8)
+
+        super().__init__(
+            grid,
+            grid.fill_scale[self.rows, self.cols],
+            (new_states == SquareState.FILLED.value).astype(float),
+            grid.cross_scale[self.rows, self.cols],
+            (new_states == SquareState.EMPTY.value).astype(float),
+            lag_ratio,
+            **kwargs,
+        )
+
+        # Like Cell.animated_set_state, the state is updated as soon as the animation is made
+        grid.states[self.rows, self.cols] = new_states
+
+    def apply_marks(self, fill: np.ndarray, cross: np.ndarray):
+        self.grid.fill_scale[self.rows, self.cols] = fill
+        self.grid.cross_scale[self.rows, self.cols] = cross
+        self.grid.draw_marks()
 
 
 class HintSegment(VMobject):
@@ -135,8 +392,9 @@ class HintSegment(VMobject):
 
         # If a value was provided, create and add text
         if value is not None:
-            # Create text with the value
-            self.text = Text(str(value), z_index=1)
+            # Create text with the value, every hint shares the same few digits so they come from the cache
+            self.text = cached_text(str(value))
+            self.text.set_z_index(1)
 
             # Scale text to fit within the square (with some padding)
             text_width = self.text.width
@@ -294,10 +552,12 @@ class CellScanner(SurroundingRectangle):
         self.shift(*(vector*self.cell_size for vector in vectors))
 
 class Game(VMobject):
-    def __init__(self, row_hints: List[List[int]], col_hints: List[List[int]], cell_size = CELL_SIZE, **kwargs):
+    def __init__(self, row_hints: List[List[int]], col_hints: List[List[int]], cell_size = CELL_SIZE, batched: bool = False, **kwargs):
         super().__init__(**kwargs)
 
-        self.grid = Grid(len(row_hints), len(col_hints), cell_size)
+        # BatchedGrid has the same API and is much cheaper for big puzzles
+        grid_type = BatchedGrid if batched else Grid
+        self.grid = grid_type(len(row_hints), len(col_hints), cell_size)
         self.row_hint_set = HintSet(row_hints, "row", cell_size)
         self.col_hint_set = HintSet(col_hints, "col", cell_size)
         self.row_hint_set.next_to(self.grid, LEFT, buff=0)
@@ -317,7 +577,7 @@ def states_to_cells(states: List[SquareState]) -> List[Cell]:
 class LabeledPointer(Arrow):
     def __init__(self, text: str, label_dir: Vector3D = DOWN, start=DOWN/2, end=UP, *args, **kwargs: Any) -> None:
         super().__init__(start, end, *args, **kwargs)
-        self.text = Text(text).next_to(self, label_dir)
+        self.text = cached_text(text).next_to(self, label_dir)
         self.add(self.text)
 
 
@@ -330,7 +590,7 @@ class SegPlacer(Line):
 
         self.unplaced_box = SurroundingRectangle(self.squares_group, buff=0)
         self.unplaced_box.next_to(self.squares_group, UP)
-        self.unplaced_label = Text("Unplaced Segments").next_to(self.unplaced_box, UP)
+        self.unplaced_label = cached_text("Unplaced Segments").next_to(self.unplaced_box, UP)
         self.create_segments(*hint)
         self.segment_group.arrange(RIGHT)
         self.segment_group.move_to(self.unplaced_box)
@@ -341,3 +601,24 @@ class SegPlacer(Line):
 
         self.add(self.unplaced_box, self.unplaced_label)
 
+
+
+class LineTemplate:
+    """
+    Stamps out copies of one fully styled Line (or SegPlacer), so the hint text, cells and segments
+    are only built and colored once no matter how many placements get shown.
+    Placements only differ in where the segments are, so that's all that changes on each copy.
+    """
+    def __init__(self, prototype: Line) -> None:
+        self.prototype = prototype
+
+    def instance(self, starts: Sequence[int | None]) -> Line:
+        line = self.prototype.copy()
+        for seg_index, start in enumerate(starts):
+            # Segments without a position stay where the prototype has them
+            if start is not None:
+                line.move_segment_to(seg_index, start)
+        return line
+
+    def instances(self, placements: Iterable[Sequence[int | None]]) -> VGroup:
+        return VGroup(*(self.instance(starts) for starts in placements))
@@ -0,0 +1,140 @@
+import argparse
+import ast
+import importlib
+import json
+import os
+import shutil
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Tuple
+
+# Modules holding the scenes of the videos
+SCENE_MODULES = ["overlap.py", "left_sol.py", "main.py"]
+# Base classes from manim that make a class a scene
+MANIM_SCENES = {"Scene", "MovingCameraScene", "ZoomedScene", "ThreeDScene"}
+# Functions that make a scene class, a module level name assigned from a call to one is a scene too
+SCENE_FACTORIES = {"overlap_scene"}
+# Wall time of every scene from the last run, used to start the slowest ones first
+TIMINGS_FILE = "render_times.json"
+
+# (module, scene)
+SceneJob = Tuple[str, str]
+# (module, scene, seconds, output file or None, error message or None)
+RenderResult = Tuple[str, str, float, str | None, str | None]
+
+
+def find_scenes(file_name: str) -> List[str]:
+    """
+    Names of every Scene subclass defined in a module, found from its source
+    so manim never has to be imported just to list them.
+    Classes deriving from another scene in the same module count too, and so do names assigned from a SCENE_FACTORIES call.
+    """
+    with open(file_name, "r") as f:
+        tree = ast.parse(f.read(), file_name)
+    classes = {
+        node.name: {base.id if isinstance(base, ast.Name) else base.attr for base in node.bases if isinstance(base, (ast.Name, ast.Attribute))}
+        for node in tree.body if isinstance(node, ast.ClassDef)
+    }
+    scenes = set()
+    changed = True
+    while changed:
+        changed = False
+        for name, bases in classes.items():
+            if name not in scenes and bases & (MANIM_SCENES | scenes):
+                scenes.add(name)
+                changed = True
+    # Keep them in the order they're written, followed by any made by a factory
+    return [name for name in classes if name in scenes] + find_generated_scenes(tree)
+
+
+def find_generated_scenes(tree: ast.Module) -> List[str]:
+    # Scenes made by a factory like overlap_scene have no class statement, but they're still assigned to a name
+    return [
+        node.targets[0].id
+        for node in tree.body
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+        and isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Name) and node.value.func.id in SCENE_FACTORIES
+    ]
+
+
+def render_scene(module: str, scene: str, media_root: str, quality: str) -> RenderResult:
+    # Runs in a worker process, manim is only imported here
+    start = time.perf_counter()
+    try:
+        from manim import tempconfig
+        scene_cls = getattr(importlib.import_module(module), scene)
+        # Every scene gets its own media directory so parallel renders never share partial movie files
+        media_dir = os.path.join(media_root, module, scene)
+        with tempconfig({"media_dir": media_dir, "quality": quality}):
+            instance = scene_cls()
+            instance.render()
+            output = str(instance.renderer.file_writer.movie_file_path)
+        # Workers never run atexit hooks, so the text cache is saved here
+        from text_cache import text_cache
+        text_cache.save()
+    except Exception:
+        return module, scene, time.perf_counter() - start, None, traceback.format_exc(limit=-3)
+    return module, scene, time.perf_counter() - start, output, None
+
+
+def load_timings(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render every scene in parallel, one process per scene")
+    parser.add_argument("modules", nargs="*", default=SCENE_MODULES, help="Files to look for scenes in")
+    parser.add_argument("--scenes", nargs="+", help="Only render scenes with these names")
+    parser.add_argument("--quality", default="high_quality", choices=["low_quality", "medium_quality", "high_quality", "production_quality", "fourk_quality"])
+    parser.add_argument("--media-dir", default=os.path.join("media", "parallel"), help="Root of the per-scene media directories")
+    parser.add_argument("--output", default=os.path.join("media", "all"), help="Directory every finished video is copied to")
+    parser.add_argument("--workers", type=int, default=None, help="Number of processes, defaults to one per core")
+    parser.add_argument("--list", action="store_true", help="Only list the scenes that would be rendered")
+    args = parser.parse_args()
+
+    jobs: List[SceneJob] = [
+        (os.path.splitext(os.path.basename(file_name))[0], scene)
+        for file_name in args.modules
+        for scene in find_scenes(file_name)
+        if not args.scenes or scene in args.scenes
+    ]
+    if args.list:
+        for module, scene in jobs:
+            print(f"{module}.{scene}")
+        raise SystemExit(0)
+    if not jobs:
+        parser.error("no scenes found")
+
+    # Longest scenes first, so a slow one doesn't end up running alone at the end
+    timings_path = os.path.join(args.media_dir, TIMINGS_FILE)
+    timings = load_timings(timings_path)
+    jobs.sort(key=lambda job: timings.get(f"{job[0]}.{job[1]}", float("inf")), reverse=True)
+
+    os.makedirs(args.output, exist_ok=True)
+    os.makedirs(args.media_dir, exist_ok=True)
+    results: List[RenderResult] = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(render_scene, module, scene, args.media_dir, args.quality) for module, scene in jobs]
+        for future in as_completed(futures):
+            module, scene, elapsed, output, error = result = future.result()
+            results.append(result)
+            if output is not None:
+                shutil.copy(output, os.path.join(args.output, f"{module}.{scene}{os.path.splitext(output)[1]}"))
+                timings[f"{module}.{scene}"] = elapsed
+            print(f"{'done' if error is None else 'FAILED':<7} {elapsed:8.1f}s  {module}.{scene}", flush=True)
+    wall = time.perf_counter() - start
+
+    with open(timings_path, "w") as f:
+        json.dump(timings, f, indent=2)
+
+    failures = [result for result in results if result[4] is not None]
+    for module, scene, _, _, error in failures:
+        print(f"\n{module}.{scene} failed:\n{error}")
+    total = sum(result[2] for result in results)
+    print(f"\n{len(results) - len(failures)}/{len(results)} scenes rendered in {wall:.1f}s ({total:.1f}s of rendering, {total / wall:.1f}x parallel)")
+    raise SystemExit(1 if failures else 0)
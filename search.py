@@ -0,0 +1,243 @@
+import argparse
+import time
+from typing import Callable, Dict, Generator, Iterable, Iterator, List, Literal, Sequence, Tuple
+import numpy as np
+from nonogram.bitline import EMPTY, FILLED, UNKNOWN, Masks, array_to_masks, bits, masks_to_array
+from nonogram.parse import normalize_hint, read_hints, write_solution_file
+from nonogram.state import Direction, Step
+from solver import Contradiction, LineCache, LineQueue, dp_solve, queue_slack
+
+SearchStatus = Literal["contradictory"] | Literal["unique"] | Literal["multiple"]
+
+
+class Search:
+    """
+    Finishes puzzles line logic alone can't.
+    Unknown cells are probed by trying both states and propagating each through row and column line solving.
+    A state that leads to a contradiction means the cell must be the other one, and when no probe settles
+    anything the search guesses the cell whose probes gave away the most, backtracking if the guess fails.
+    Every change to the grid goes into an undo log, so probing and backtracking just replay the log backwards
+    instead of keeping a copy of the grid for every branch.
+    run streams the line solving up to the first guess and then the rows of the first solution, so the
+    trace stays the same size however many branches get explored. With trace_search every change of the search
+    is streamed instead, backtracking included (cells going back to unknown), so the whole search can be replayed
+    by VisualizeSolution. Probes are undone before moving on and never show up in the trace.
+    """
+    def __init__(self, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], line_solver: Callable[[Sequence[int], int, int, int], Masks] | None = None, max_solutions: int = 2, max_probes: int = 48, trace_search: bool = False, grid: np.ndarray | None = None) -> None:
+        self.row_hints = [normalize_hint(hint) for hint in row_hints]
+        self.col_hints = [normalize_hint(hint) for hint in col_hints]
+        # Probing solves the same partial lines over and over, so they're cached by default
+        self.line_solver = line_solver or LineCache(dp_solve)
+        # Every probe makes a new queue, the slack of each line never changes
+        self.priority = queue_slack(self.row_hints, self.col_hints)
+        # How many cells get probed before each guess
+        self.max_probes = max_probes
+        # Stop once this many solutions have been found, 2 is enough to tell a unique puzzle apart
+        self.max_solutions = max_solutions
+        self.trace_search = trace_search
+        # Can start from a grid line solving already got partway through, cells known at the start are never undone
+        self.grid = np.zeros((len(row_hints), len(col_hints)), dtype=np.uint8) if grid is None else grid.copy()
+        # (row, col, old state) for every cell change, newest last
+        self.undo_log: List[Tuple[int, int, int]] = []
+        self.solutions: List[np.ndarray] = []
+        self.guesses = 0
+
+    @property
+    def status(self) -> SearchStatus:
+        match len(self.solutions):
+            case 0:
+                return "contradictory"
+            case 1:
+                return "unique"
+            case _:
+                return "multiple"
+
+    def line_view(self, direction: Direction, i: int) -> np.ndarray:
+        return self.grid[i] if direction == "row" else self.grid[:, i]
+
+    def step(self, direction: Direction, i: int) -> Step:
+        return (self.line_view(direction, i).tolist(), i, direction)
+
+    def propagate(self, lines: Iterable[Tuple[Direction, int]]) -> Generator[Step, None, bool]:
+        # Line solves until nothing changes, returns False on a contradiction
+        hints = {"row": self.row_hints, "col": self.col_hints}
+        queue = LineQueue(self.row_hints, self.col_hints, lines, self.priority)
+        while queue:
+            direction, i = queue.pop()
+            view = self.line_view(direction, i)
+            filled, empty = array_to_masks(view)
+            try:
+                new_filled, new_empty = self.line_solver(hints[direction][i], filled, empty, len(view))
+            except Contradiction:
+                return False
+            changed = (new_filled ^ filled) | (new_empty ^ empty)
+            if not changed:
+                continue
+            other = "col" if direction == "row" else "row"
+            for j in bits(changed):
+                row, col = (i, j) if direction == "row" else (j, i)
+                self.undo_log.append((row, col, int(self.grid[row, col])))
+                queue.push(other, j)
+            view[:] = masks_to_array(new_filled, new_empty, len(view))
+            yield self.step(direction, i)
+        return True
+
+    def assign(self, row: int, col: int, state: int) -> Generator[Step, None, bool]:
+        self.guesses += 1
+        return (yield from self.set_cell(row, col, state))
+
+    def set_cell(self, row: int, col: int, state: int) -> Generator[Step, None, bool]:
+        return (yield from self.set_cells([row], [col], state))
+
+    def set_cells(self, rows: Sequence[int], cols: Sequence[int], states: np.ndarray | int) -> Generator[Step, None, bool]:
+        self.undo_log.extend((int(row), int(col), int(self.grid[row, col])) for row, col in zip(rows, cols))
+        self.grid[rows, cols] = states
+        for row in sorted(set(rows)):
+            yield self.step("row", int(row))
+        return (yield from self.propagate([*(("row", int(row)) for row in set(rows)), *(("col", int(col)) for col in set(cols))]))
+
+    def undo(self, mark: int) -> Iterator[Step]:
+        # Rolls the grid back to how it was when the log was mark entries long
+        rows = set()
+        while len(self.undo_log) > mark:
+            row, col, old = self.undo_log.pop()
+            self.grid[row, col] = old
+            rows.add(row)
+        for row in sorted(rows):
+            yield self.step("row", row)
+
+    def probe_candidates(self) -> List[Tuple[int, int]]:
+        # Unknown cells in the rows and columns with the fewest unknowns left, where a probe is most likely to settle things
+        unknown = self.grid == UNKNOWN
+        rows, cols = np.nonzero(unknown)
+        scores = unknown.sum(axis=1)[rows] + unknown.sum(axis=0)[cols]
+        order = np.argsort(scores, kind="stable")[:self.max_probes]
+        return [(int(rows[i]), int(cols[i])) for i in order]
+
+    def probe(self, row: int, col: int, state: int) -> Dict[Tuple[int, int], int] | None:
+        """
+        Every cell setting the cell to state would settle and what to, read back out of the undo log
+        before it's rolled back. None if it leads to a contradiction.
+        """
+        mark = len(self.undo_log)
+        guesses = self.guesses
+        steps = self.assign(row, col, state)
+        try:
+            while True:
+                next(steps)
+        except StopIteration as result:
+            ok = result.value
+        settled = {(row, col): int(self.grid[row, col]) for row, col, _ in self.undo_log[mark:]} if ok else None
+        # Undo without emitting anything, the probe never happened as far as the trace is concerned
+        for _ in self.undo(mark):
+            pass
+        self.guesses = guesses
+        return settled
+
+    def choose_cell(self) -> Generator[Step, None, Tuple[int, int, int] | None | bool]:
+        """
+        Probes candidate cells, applying any state forced by a contradiction along the way,
+        as well as anything both states of a cell agree on.
+        Returns the cell to guess next and the state to try first, None when the grid is full,
+        or False if the current branch is a dead end.
+        """
+        while True:
+            candidates = self.probe_candidates()
+            if not candidates:
+                return None
+            best = None
+            best_score = -1
+            changed = False
+            for row, col in candidates:
+                # An earlier candidate in this pass may have settled it already
+                if self.grid[row, col] != UNKNOWN:
+                    continue
+                filled = self.probe(row, col, FILLED)
+                empty = self.probe(row, col, EMPTY)
+                if filled is None and empty is None:
+                    return False
+                if filled is None or empty is None:
+                    forced = empty if filled is None else filled
+                else:
+                    forced = {cell: state for cell, state in filled.items() if empty.get(cell) == state}
+                if forced:
+                    # A contradiction or both states agreeing settles cells for good, the rest of the pass carries on from there
+                    ok = yield from self.set_cells([cell[0] for cell in forced], [cell[1] for cell in forced], np.array(list(forced.values())))
+                    if not ok:
+                        return False
+                    changed = True
+                    # Scores from before the change are out of date
+                    best, best_score = None, -1
+                    continue
+                # Prefer cells where both guesses settle a lot, so either branch makes real progress
+                score = len(filled) * len(empty)
+                if score > best_score:
+                    # The branch that settles less is tried first, it's the one that rules out the fewest solutions
+                    best, best_score = (row, col, FILLED if len(filled) <= len(empty) else EMPTY), score
+            if not changed or best is not None:
+                return best
+
+    def run(self) -> Iterator[Step]:
+        lines = [(direction, i) for direction, hints in (("row", self.row_hints), ("col", self.col_hints)) for i in range(len(hints))]
+        # Line solving before the first guess is never undone, so it always goes in the trace
+        ok = yield from self.propagate(lines)
+        if self.trace_search:
+            yield from self.search(ok)
+            shown = self.grid
+        else:
+            # Nothing from the search goes in the trace, so it still shows the grid from before the first guess
+            shown = self.grid.copy()
+            for _ in self.search(ok):
+                pass
+        # Looking for a second solution backtracks past the first one, so the trace ends by putting it back
+        if self.solutions:
+            solution = self.solutions[0]
+            for row in np.flatnonzero((shown != solution).any(axis=1)):
+                yield (solution[row].tolist(), int(row), "row")
+            self.grid[:] = solution
+
+    def search(self, ok: bool) -> Iterator[Step]:
+        # Each entry is the log length before a guess, the guessed cell, and the other state still to try
+        stack: List[Tuple[int, int, int, int | None]] = []
+        while True:
+            if ok:
+                cell = yield from self.choose_cell()
+                if cell is False:
+                    ok = False
+                elif cell is None:
+                    self.solutions.append(self.grid.copy())
+                    if len(self.solutions) >= self.max_solutions:
+                        return
+                    # Keep going to look for another solution
+                    ok = False
+                else:
+                    row, col, state = cell
+                    stack.append((len(self.undo_log), row, col, EMPTY if state == FILLED else FILLED))
+                    ok = yield from self.assign(row, col, state)
+                    continue
+
+            while stack:
+                mark, row, col, other = stack.pop()
+                yield from self.undo(mark)
+                if other is not None:
+                    stack.append((mark, row, col, None))
+                    ok = yield from self.assign(row, col, other)
+                    break
+            else:
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a puzzle with line solving and backtracking, writing a trace of the solution")
+    parser.add_argument("puzzle", help="File starting with the row and column hints")
+    parser.add_argument("output", nargs="?", default="solution.txt")
+    parser.add_argument("--trace-search", action="store_true", help="Write every guess and backtrack instead of just the solution")
+    args = parser.parse_args()
+
+    row_hints, col_hints = read_hints(args.puzzle)
+    search = Search(row_hints, col_hints, trace_search=args.trace_search)
+    start = time.perf_counter()
+    # Steps are written out as they're found instead of being collected first
+    write_solution_file(args.output, row_hints, col_hints, search.run())
+    elapsed = time.perf_counter() - start
+    print(f"{search.status} after {search.guesses} guesses in {elapsed:.3f}s")
@@ -0,0 +1,307 @@
+import argparse
+import heapq
+import os
+import pickle
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+import numpy as np
+from nonogram.bitline import EMPTY, FILLED, UNKNOWN, Masks, array_to_masks, bits, from_masks, left_starts, masks_to_array, overlap_masks, right_starts, to_masks
+from nonogram.parse import normalize_hint, read_hints, write_solution_file
+from nonogram.state import Direction, Step
+
+
+class Contradiction(ValueError):
+    pass
+
+
+def left_solution(hint: Sequence[int], line: Sequence[int]) -> List[int] | None:
+    """
+    Start index of each segment when every segment is pushed as far left as it can go
+    without contradicting the known cells of line. None if there is no valid placement.
+    """
+    return left_starts(hint, *to_masks(line), len(line))
+
+
+def right_solution(hint: Sequence[int], line: Sequence[int]) -> List[int] | None:
+    return right_starts(hint, *to_masks(line), len(line))
+
+
+def overlap_solve(hint: Sequence[int], filled: int, empty: int, length: int) -> Masks:
+    # Overlap method on a line stored as masks, returns the masks with everything it found added
+    left = left_starts(hint, filled, empty, length)
+    right = right_starts(hint, filled, empty, length)
+    if left is None or right is None:
+        raise Contradiction(f"No placement of {list(hint)} fits the line")
+    new_filled, new_empty = overlap_masks(hint, left, right, length)
+    return filled | new_filled, empty | new_empty
+
+
+def overlap_line(hint: Sequence[int], line: Sequence[int]) -> List[int]:
+    """
+    Runs the overlap method on one line.
+    Cells covered by the same segment in both the left and right solutions are filled,
+    and cells sitting in the same gap in both solutions are empty.
+    """
+    return from_masks(*overlap_solve(hint, *to_masks(line), len(line)), len(line))
+
+
+def dp_solve(hint: Sequence[int], filled: int, empty: int, length: int) -> Masks:
+    """
+    Finds every cell of a line that is the same in all valid placements, without enumerating them.
+    One pass forward works out which prefixes can hold which segments and one pass backward does the same
+    for suffixes, so a cell can be empty if some split around it works and can be filled if some valid
+    placement of a segment covers it. Runs in O(length * segments).
+    """
+    n_segs = len(hint)
+
+    is_filled = [bool(filled >> i & 1) for i in range(length)]
+
+    # fwd[j][i] is True when cells [0, i) can hold exactly the first j segments
+    fwd = [[False] * (length + 1) for _ in range(n_segs + 1)]
+    fwd[0][0] = True
+    for i in range(1, length + 1):
+        fwd[0][i] = fwd[0][i - 1] and not is_filled[i - 1]
+
+    # The first j segments fit in [0, s) with a gap right before s for whatever comes next
+    def before(j: int, s: int) -> bool:
+        if j == 0:
+            return fwd[0][s]
+        return s >= 1 and not is_filled[s - 1] and fwd[j][s - 1]
+
+    for j in range(1, n_segs + 1):
+        seg = hint[j - 1]
+        seg_mask = (1 << seg) - 1
+        row = fwd[j]
+        for i in range(seg, length + 1):
+            start = i - seg
+            row[i] = (row[i - 1] and not is_filled[i - 1]) or (not empty >> start & seg_mask and before(j - 1, start))
+
+    if not fwd[n_segs][length]:
+        raise Contradiction(f"No placement of {list(hint)} fits the line")
+
+    # bwd[j][i] is True when cells [i, length) can hold exactly segments j onwards
+    bwd = [[False] * (length + 1) for _ in range(n_segs + 1)]
+    bwd[n_segs][length] = True
+    for i in range(length - 1, -1, -1):
+        bwd[n_segs][i] = bwd[n_segs][i + 1] and not is_filled[i]
+
+    # Segments j onwards fit in [e, length) with a gap right at e before them
+    def after(j: int, e: int) -> bool:
+        if j == n_segs:
+            return bwd[n_segs][e]
+        return e < length and not is_filled[e] and bwd[j][e + 1]
+
+    for j in range(n_segs - 1, -1, -1):
+        seg = hint[j]
+        seg_mask = (1 << seg) - 1
+        row = bwd[j]
+        for i in range(length - seg, -1, -1):
+            row[i] = (not is_filled[i] and row[i + 1]) or (not empty >> i & seg_mask and after(j + 1, i + seg))
+
+    can_fill = 0
+    for j, seg in enumerate(hint):
+        seg_mask = (1 << seg) - 1
+        for start in range(length - seg + 1):
+            if not empty >> start & seg_mask and before(j, start) and after(j + 1, start + seg):
+                can_fill |= seg_mask << start
+
+    can_empty = 0
+    for i in range(length):
+        if not is_filled[i] and any(fwd[j][i] and bwd[j][i + 1] for j in range(n_segs + 1)):
+            can_empty |= 1 << i
+
+    return filled | (can_fill & ~can_empty), empty | (can_empty & ~can_fill)
+
+
+def solve_line(hint: Sequence[int], line: Sequence[int]) -> List[int]:
+    """
+    Fills in every cell that is forced by hint, the same result as intersecting every placement.
+    Raises Contradiction if no placement fits the line.
+    """
+    return from_masks(*dp_solve(hint, *to_masks(line), len(line)), len(line))
+
+
+class LineCache:
+    """
+    LRU cache in front of a line solver, keyed by the hint and the line's masks.
+    It takes the same arguments as the line solvers, so it can be passed to solve() in their place.
+    The same hint and partial line keep coming back across lines, sweeps and puzzles,
+    so with path set the cache is loaded from and saved to disk to carry over between runs.
+    """
+    def __init__(self, line_solver: Callable[[Sequence[int], int, int, int], Masks] = overlap_solve, max_size: int = 100_000, path: str | None = None) -> None:
+        self.line_solver = line_solver
+        self.max_size = max_size
+        self.path = path
+        # None marks a line that has no valid placement
+        self.entries: OrderedDict[Tuple[Tuple[int, ...], int, int, int], Masks | None] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def __call__(self, hint: Sequence[int], filled: int, empty: int, length: int) -> Masks:
+        key = (tuple(hint), length, filled, empty)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result = self.entries[key]
+        else:
+            self.misses += 1
+            try:
+                result = self.line_solver(hint, filled, empty, length)
+            except Contradiction:
+                result = None
+            self.entries[key] = result
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+        if result is None:
+            raise Contradiction(f"No placement of {list(hint)} fits the line")
+        return result
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                saved = pickle.load(f)
+            # Results from a different line solver aren't the same answers
+            if saved["line_solver"] != self.line_solver.__name__:
+                return
+        except (OSError, EOFError, pickle.UnpicklingError, KeyError, TypeError):
+            # An unreadable cache just means starting from an empty one
+            return
+        self.entries = saved["entries"]
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path:
+            return
+        # Written next to the cache and swapped in, so a crash or a concurrent run never leaves half a file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"line_solver": self.line_solver.__name__, "entries": self.entries}, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+def line_slack(length: int, hint: Sequence[int]) -> int:
+    # How far the segments can move around, the tighter a line is the more solving it gives away
+    return length - sum(hint) - max(len(hint) - 1, 0)
+
+
+def queue_slack(row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]]) -> Dict[Direction, List[int]]:
+    return {
+        "row": [line_slack(len(col_hints), hint) for hint in row_hints],
+        "col": [line_slack(len(row_hints), hint) for hint in col_hints],
+    }
+
+
+def queue_sweeps(row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]]) -> Dict[Direction, List[int]]:
+    # Every row before every column, in index order, the same order as sweeping the rows and then the columns
+    return {"row": [0] * len(row_hints), "col": [1] * len(col_hints)}
+
+
+class LineQueue:
+    """
+    Work queue of lines that need solving.
+    A line is queued again only when a crossing line changes one of its cells, and it goes into the next round
+    so a line picks up every change from the current round in one solve instead of one solve per change.
+    Within a round the lines with the lowest priority go first, by default that's the lines with the least slack.
+    """
+    def __init__(self, row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], lines: Iterable[Tuple[Direction, int]] | None = None, priority: Dict[Direction, List[int]] | None = None) -> None:
+        # Callers making lots of queues for the same puzzle can work out the priorities once and pass them in
+        self.priority = priority or queue_slack(row_hints, col_hints)
+        self.heap: List[Tuple[int, int, Direction, int]] = []
+        self.queued = set()
+        self.round = -1
+        # Number of lines handed out so far
+        self.solves = 0
+        # Every line starts queued unless only some are asked for
+        if lines is None:
+            lines = [(direction, i) for direction in ("row", "col") for i in range(len(self.priority[direction]))]
+        for direction, i in lines:
+            self.push(direction, i)
+
+    def push(self, direction: Direction, i: int):
+        if (direction, i) in self.queued:
+            return
+        self.queued.add((direction, i))
+        heapq.heappush(self.heap, (self.round + 1, self.priority[direction][i], direction, i))
+
+    def pop(self) -> Tuple[Direction, int]:
+        self.round, _, direction, i = heapq.heappop(self.heap)
+        self.queued.remove((direction, i))
+        self.solves += 1
+        return direction, i
+
+    def __bool__(self) -> bool:
+        return bool(self.heap)
+
+
+def solve(row_hints: Sequence[Sequence[int]], col_hints: Sequence[Sequence[int]], line_solver: Callable[[Sequence[int], int, int, int], Masks] = overlap_solve, by_slack: bool = False) -> Tuple[np.ndarray, List[Step]]:
+    """
+    Solves as much of the puzzle as line logic allows.
+    line_solver is overlap_solve by default to match the videos, dp_solve finds everything a single line can tell.
+    Lines are solved in sweeps, the rows and then the columns, which is the order solution.txt was written in.
+    by_slack solves the tightest lines first instead, which takes fewer solves on big puzzles.
+    Returns the final grid and the list of steps in the order they were found.
+    Cells that are still unknown at the end are left as UNKNOWN.
+    """
+    row_hints = [normalize_hint(hint) for hint in row_hints]
+    col_hints = [normalize_hint(hint) for hint in col_hints]
+    grid = np.zeros((len(row_hints), len(col_hints)), dtype=np.uint8)
+    steps: List[Step] = []
+    hints = {"row": row_hints, "col": col_hints}
+
+    # Only lines crossing a cell that just changed need to be looked at again
+    queue = LineQueue(row_hints, col_hints, priority=None if by_slack else queue_sweeps(row_hints, col_hints))
+    while queue:
+        direction, i = queue.pop()
+        view = grid[i] if direction == "row" else grid[:, i]
+        filled, empty = array_to_masks(view)
+        try:
+            new_filled, new_empty = line_solver(hints[direction][i], filled, empty, len(view))
+        except Contradiction as e:
+            raise Contradiction(f"{direction} {i}: {e}") from None
+        changed = (new_filled ^ filled) | (new_empty ^ empty)
+        if not changed:
+            continue
+        view[:] = masks_to_array(new_filled, new_empty, len(view))
+        steps.append((view.tolist(), i, direction))
+        other = "col" if direction == "row" else "row"
+        for j in bits(changed):
+            queue.push(other, j)
+
+    return grid, steps
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Solve a puzzle with the overlap method and write a solution trace")
+    parser.add_argument("puzzle", help="File starting with the row and column hints")
+    parser.add_argument("output", nargs="?", default="solution.txt")
+    parser.add_argument("--full", action="store_true", help="Use the complete line solver instead of just overlap")
+    parser.add_argument("--by-slack", action="store_true", help="Solve the tightest lines first instead of sweeping rows then columns")
+    parser.add_argument("--cache", help="File to keep solved lines in between runs")
+    parser.add_argument("--cache-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    row_hints, col_hints = read_hints(args.puzzle)
+    cache = LineCache(dp_solve if args.full else overlap_solve, args.cache_size, args.cache)
+    start = time.perf_counter()
+    grid, steps = solve(row_hints, col_hints, cache, args.by_slack)
+    elapsed = time.perf_counter() - start
+    cache.save()
+    write_solution_file(args.output, row_hints, col_hints, steps)
+    unknown = int(np.count_nonzero(grid == UNKNOWN))
+    print(f"{len(steps)} steps in {elapsed:.3f}s, {unknown} cells left unknown")
+    print(f"line cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate:.0%})")
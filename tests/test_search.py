@@ -0,0 +1,50 @@
+import time
+from typing import List
+import numpy as np
+from nonogram.bitline import EMPTY, FILLED
+from search import Search
+
+
+def line_hint(line: np.ndarray) -> List[int]:
+    padded = np.concatenate(([False], line == FILLED, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return (edges[1::2] - edges[::2]).tolist()
+
+
+def random_grid(size: int, density: float, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random((size, size)) < density, FILLED, EMPTY).astype(np.uint8)
+
+
+def test_search_random_30x30_multiple():
+    # Line solving settles almost none of this one and it has more than one solution, so it needs real branching
+    grid = random_grid(30, 0.5, 4)
+    row_hints = [line_hint(row) for row in grid]
+    col_hints = [line_hint(col) for col in grid.T]
+    search = Search(row_hints, col_hints)
+    start = time.perf_counter()
+    list(search.run())
+    elapsed = time.perf_counter() - start
+
+    assert search.status == "multiple"
+    assert search.guesses < 200
+    assert elapsed < 30
+    for solution in search.solutions:
+        assert [line_hint(row) for row in solution] == row_hints
+        assert [line_hint(col) for col in solution.T] == col_hints
+    assert not (search.solutions[0] == search.solutions[1]).all()
+
+
+def test_search_trace_ends_at_solution():
+    grid = random_grid(12, 0.5, 0)
+    row_hints = [line_hint(row) for row in grid]
+    col_hints = [line_hint(col) for col in grid.T]
+    for trace_search in (False, True):
+        search = Search(row_hints, col_hints, trace_search=trace_search)
+        replay = np.zeros_like(grid)
+        for line, i, direction in search.run():
+            if direction == "row":
+                replay[i] = line
+            else:
+                replay[:, i] = line
+        assert (replay == search.solutions[0]).all()
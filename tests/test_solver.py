@@ -0,0 +1,71 @@
+import functools
+import itertools
+import os
+from typing import List, Tuple
+import pytest
+from nonogram.bitline import EMPTY, FILLED, UNKNOWN, from_masks, to_masks
+from nonogram.parse import read_solution
+from nonogram.placements import count_placements, placements
+from solver import Contradiction, dp_solve, overlap_solve, solve
+
+MAX_LENGTH = 6
+SOLUTION = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "solution.txt")
+
+
+def line_hint(line: Tuple[int, ...]) -> List[int]:
+    return [len(run) for run in "".join("o" if cell == FILLED else " " for cell in line).split()]
+
+
+def starts(line: Tuple[int, ...]) -> Tuple[int, ...]:
+    return tuple(i for i, cell in enumerate(line) if cell == FILLED and (i == 0 or line[i - 1] != FILLED))
+
+
+@functools.cache
+def cases() -> List[Tuple[int, List[int], List[int], List[Tuple[int, ...]]]]:
+    # Every hint that fits each length, against every partial line of that length
+    found = []
+    for length in range(1, MAX_LENGTH + 1):
+        full_lines = list(itertools.product((FILLED, EMPTY), repeat=length))
+        hints = sorted({tuple(line_hint(line)) for line in full_lines})
+        for hint in hints:
+            for partial in itertools.product((UNKNOWN, FILLED, EMPTY), repeat=length):
+                # Every full line the partial one could still become that has the right hint
+                matches = [line for line in full_lines if line_hint(line) == list(hint) and all(known in (UNKNOWN, cell) for known, cell in zip(partial, line))]
+                found.append((length, list(hint), list(partial), matches))
+    return found
+
+
+def test_dp_solve_matches_brute_force():
+    for length, hint, partial, matches in cases():
+        if not matches:
+            with pytest.raises(Contradiction):
+                dp_solve(hint, *to_masks(partial), length)
+            continue
+        # A cell is forced when every matching line agrees on it
+        expected = [column[0] if len(set(column)) == 1 else UNKNOWN for column in zip(*matches)]
+        assert from_masks(*dp_solve(hint, *to_masks(partial), length), length) == expected, (hint, partial)
+
+
+def test_overlap_solve_agrees_with_brute_force():
+    # Overlap finds less than dp_solve, but never anything wrong
+    for length, hint, partial, matches in cases():
+        if not matches:
+            continue
+        result = from_masks(*overlap_solve(hint, *to_masks(partial), length), length)
+        for i, cell in enumerate(result):
+            if cell != UNKNOWN:
+                assert all(line[i] == cell for line in matches), (hint, partial)
+
+
+def test_placements_match_brute_force():
+    for length, hint, partial, matches in cases():
+        assert count_placements(length, hint, partial) == len(matches), (hint, partial)
+        assert list(placements(length, hint, partial)) == sorted(starts(line) for line in matches), (hint, partial)
+
+
+def test_solve_reproduces_solution_file():
+    row_hints, col_hints, steps = read_solution(SOLUTION)
+    expected = [([square.value for square in line], i, direction) for line, i, direction in steps]
+    grid, solved = solve(row_hints, col_hints, overlap_solve)
+    assert solved == expected
+    assert not (grid == UNKNOWN).any()
@@ -0,0 +1,24 @@
+import pytest
+from nonogram.placements import placements
+from nonogram.tree import edge_list_from_nodes, generate_nodes_from_leaves, tree_from_leaves
+
+
+@pytest.mark.parametrize("length, hint", [
+    (5, [1]),
+    (8, [3, 2]),
+    (10, [1, 1, 1]),
+    (12, [2, 1, 3]),
+    (15, [1, 2, 1, 2]),
+])
+def test_tree_from_leaves_matches_separate_passes(length, hint):
+    leaves = sorted(placements(length, hint))
+    nodes, edges = tree_from_leaves(leaves)
+    expected_nodes = generate_nodes_from_leaves(leaves)
+    assert nodes == expected_nodes
+    assert edges == edge_list_from_nodes(expected_nodes)
+
+
+def test_tree_from_leaves_streams():
+    # A generator works as well as a list, and no leaves means no tree
+    assert tree_from_leaves(placements(8, [3, 2])) == tree_from_leaves(list(placements(8, [3, 2])))
+    assert tree_from_leaves([]) == ([], [])
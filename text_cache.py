@@ -0,0 +1,100 @@
+import atexit
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Dict, List, Tuple
+from manim import Text, VGroup, VMobject, np
+
+# Raw drawing data of one glyph, enough to rebuild it without Pango
+GlyphData = Tuple[np.ndarray, np.ndarray, np.ndarray, float]
+TextKey = Tuple[str, str, float]
+
+
+class TextCache:
+    """
+    Size bounded cache of laid out text, keyed by (string, font, scale).
+    Text only goes through Pango the first time a key is seen, every later request gets a copy.
+    Entries are kept as plain VMobject glyphs so they can be written to disk and reloaded
+    by the next render when path is set.
+    """
+    def __init__(self, max_size: int = 512, path: str | None = None) -> None:
+        self.max_size = max_size
+        self.path = path
+        self.entries: OrderedDict[TextKey, VGroup] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.loaded = False
+
+    def get(self, text: str, font: str = "", scale: float = 1.0) -> VGroup:
+        if not self.loaded:
+            self.load()
+        key = (text, font, scale)
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        else:
+            self.misses += 1
+            self.entries[key] = self.from_glyphs(self.to_glyphs(Text(text, font=font).scale(scale)))
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return self.entries[key].copy()
+
+    @staticmethod
+    def to_glyphs(mob: VMobject) -> List[GlyphData]:
+        return [
+            (glyph.points.copy(), glyph.get_fill_rgbas().copy(), glyph.get_stroke_rgbas().copy(), glyph.get_stroke_width())
+            for glyph in mob.family_members_with_points()
+        ]
+
+    @staticmethod
+    def from_glyphs(glyphs: List[GlyphData]) -> VGroup:
+        group = VGroup()
+        for points, fill_rgbas, stroke_rgbas, stroke_width in glyphs:
+            glyph = VMobject()
+            glyph.set_points(points.copy())
+            glyph.set_rgba_array_direct(fill_rgbas.copy(), name="fill_rgbas")
+            glyph.set_rgba_array_direct(stroke_rgbas.copy(), name="stroke_rgbas")
+            glyph.set_stroke(width=stroke_width)
+            group.add(glyph)
+        return group
+
+    def load(self):
+        self.loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                saved: Dict[TextKey, List[GlyphData]] = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # A broken cache only costs the Pango calls it would have saved
+            return
+        entries = OrderedDict((key, self.from_glyphs(glyphs)) for key, glyphs in saved.items())
+        # Anything already laid out this run is newer than what was saved
+        entries.update(self.entries)
+        self.entries = entries
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def save(self):
+        if not self.path or not self.entries:
+            return
+        # Written next to the cache and swapped in, so concurrent renders never see half a file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({key: self.to_glyphs(mob) for key, mob in self.entries.items()}, f)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+
+# Shared by every mobject in the process, set NONOGRAM_TEXT_CACHE to a file path to keep it between renders
+text_cache = TextCache(path=os.environ.get("NONOGRAM_TEXT_CACHE"))
+# Process pool workers exit without running atexit, so they have to call text_cache.save() themselves
+atexit.register(text_cache.save)
+
+
+def cached_text(text: str, font: str = "", scale: float = 1.0) -> VGroup:
+    return text_cache.get(text, font, scale)
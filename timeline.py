@@ -0,0 +1,87 @@
+from typing import Any, Callable, Dict, List, Tuple
+from manim import Animation, AnimationGroup, Mobject, Succession, Transform, Wait
+from manim.animation.animation import prepare_animation
+from manim.typing import Vector3D
+from nonogram import SquareState
+from puzzle import Cell, CellScanner, Line
+
+
+class Timeline:
+    """
+    Keyframes declared in order and compiled into one AnimationGroup, so a run of small moves costs
+    a single self.play (and partial movie file) instead of one each.
+    Keyframes play back to back with the same run times as separate self.play calls would have.
+
+    .animate builds its target from where a mobject is right now, so the moves here are built
+    against a copy of the mobject that is kept where it will be once the earlier keyframes have played.
+    """
+    def __init__(self) -> None:
+        self.time = 0.0
+        self.keyframes: List[Tuple[float, Animation]] = []
+        # id -> (mobject, copy of it as of the last keyframe)
+        self.ghosts: Dict[int, Tuple[Mobject, Mobject]] = {}
+
+    def add(self, *animations: Animation | None, run_time: float | None = None) -> "Timeline":
+        """
+        One keyframe, everything in it starts at the same time like the arguments of self.play.
+        Each animation keeps its own run time unless run_time is given, and the next keyframe starts once the longest is done.
+        """
+        # animated_set_state gives None when the state doesn't change, and .animate builders need turning into animations to have a run time
+        animations = [prepare_animation(animation) for animation in animations if animation is not None]
+        for animation in animations:
+            if run_time is not None:
+                animation.run_time = run_time
+            self.keyframes.append((self.time, animation))
+        # A keyframe with nothing left in it still takes as long as one would have
+        self.time += max((animation.run_time for animation in animations), default=1.0 if run_time is None else run_time)
+        return self
+
+    def wait(self, duration: float = 1.0) -> "Timeline":
+        self.time += duration
+        return self
+
+    def move(self, mobject: Mobject, change: Callable[[Mobject], Any]) -> Animation:
+        # Same as mobject.animate with change applied, but starting from where the earlier keyframes leave it
+        if id(mobject) not in self.ghosts:
+            self.ghosts[id(mobject)] = (mobject, mobject.copy())
+        ghost = self.ghosts[id(mobject)][1]
+        change(ghost)
+        return Transform(mobject, ghost.copy())
+
+    def shift_by_cell(self, scanner: CellScanner, *vectors: Vector3D) -> Animation:
+        return self.move(scanner, lambda ghost: ghost.shift_by_cell(*vectors))
+
+    def slide_segment(self, line: Line, seg_index: int, vector: Vector3D) -> Animation:
+        return self.move(line.segment_group[seg_index], lambda ghost: ghost.shift(vector*line.cell_size))
+
+    def move_segment_to(self, line: Line, seg_index: int, square_index: int) -> Animation:
+        return self.move(line.segment_group[seg_index], lambda ghost: ghost.move_to(line.squares_group[square_index]))
+
+    def set_state(self, cell: Cell, state: SquareState) -> Animation | None:
+        return cell.animated_set_state(state)
+
+    def scan(self, scanner: CellScanner, vector: Vector3D, cells: int = 1) -> "Timeline":
+        # One keyframe per cell, the scanner stops on every square it passes
+        for _ in range(cells):
+            self.add(self.shift_by_cell(scanner, vector))
+        return self
+
+    def compile(self) -> Animation:
+        # Keyframes after the first are held back with a Wait, Succession only begins them once the Wait is over
+        animations = [
+            animation if start == 0 else Succession(Wait(start), animation)
+            for start, animation in self.keyframes
+        ]
+        # A trailing wait keeps the group going until the end of the timeline
+        if max(start + animation.run_time for start, animation in self.keyframes) < self.time:
+            animations.append(Wait(self.time))
+        return AnimationGroup(*animations)
+
+    def play(self, scene) -> None:
+        if self.keyframes:
+            scene.play(self.compile())
+        elif self.time:
+            scene.wait(self.time)
+        self.time = 0.0
+        self.keyframes = []
+        self.ghosts = {}